@@ -16,37 +16,24 @@ Fichier de recommandations et scripts d'assistance
 # 4. Éditer les commandes pour lier au nouvel employé
 
 # Approche script (pour gros volume):
-# Contacter l'administrateur Odoo pour exécuter :
+# La migration 18.0.1.1.0 (migrations/18.0.1.1.0/post-migration.py) le fait
+# automatiquement, en deux requêtes ensemblistes. Pour la relancer
+# (par exemple après un import de commandes), depuis le shell Odoo :
 
 """
-from odoo import api, models
-
-@api.model
-def migrate_employee_names():
-    # Récupérer toutes les commandes avec employee_name
-    commandes = self.env['lagunes.commande'].search([])
-    
-    for commande in commandes:
-        if commande.employee_name and not commande.employee_id:
-            # Chercher l'employé existant ou en créer un
-            employee = self.env['lagunes.employee'].search([
-                ('name', '=', commande.employee_name),
-                ('entreprise_id', '=', commande.entreprise_id.id)
-            ])
-            
-            if not employee:
-                # Créer un nouvel employé
-                employee = self.env['lagunes.employee'].create({
-                    'name': commande.employee_name,
-                    'entreprise_id': commande.entreprise_id.id
-                })
-            
-            # Lier à la commande
-            commande.employee_id = employee.id
-    
-    return True
+env['lagunes.employee']._migrate_employee_names()
+env.cr.commit()
 """
 
+# MENUS QUI SE CHEVAUCHENT
+# ========================
+
+# La migration 18.0.1.3.0 (migrations/18.0.1.3.0/pre-migration.py) archive,
+# avant la création de la contrainte d'exclusion, chaque menu actif qui
+# chevauche un menu antérieur de la même entreprise. Les menus archivés
+# sont listés dans le journal (WARNING) : les vérifier après la mise à jour
+# (Menus → filtre Archivés).
+
 # DONNÉES INITIALES À CRÉER
 # =========================
 
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 {
     'name': 'Restaurant des Lagunes - Cantine',
-    'version': '18.0.1.0.0',
+    'version': '18.0.1.4.0',
     'category': 'Sales/Sales',
     'summary': 'Gestion de cantine d\'entreprise pour Restaurant des Lagunes',
     'description': """
@@ -21,11 +21,16 @@
     'website': 'https://www.restaurantdeslagunes.com',
     'depends': [
         'base',
+        'bus',
         'product',
         'sale_management',
         'website',
         'website_sale',
+        'migration_tools',
     ],
+    'external_dependencies': {
+        'python': ['numpy'],
+    },
     'data': [
         # Sécurité
         'security/lagunes_security.xml',
@@ -35,15 +40,22 @@
         # Données
         'data/product_data.xml',
         'data/plat_option_data.xml',
+        'data/lagunes_cron.xml',
         
         # Vues
+        'views/lagunes_employee_views.xml',
         'views/res_partner_views.xml',
         'views/lagunes_plat_option_views.xml',
         'views/lagunes_menu_pack_views.xml',
         'views/lagunes_menu_views.xml',
+        'views/lagunes_menu_duplicate_wizard_views.xml',
+        'views/lagunes_menu_planner_views.xml',
         'views/lagunes_plat_views.xml',
         'views/lagunes_commande_views.xml',
+        'views/lagunes_commande_forecast_views.xml',
         'views/lagunes_menu_web.xml',
+        'views/lagunes_billing_wizard_views.xml',
+        'views/lagunes_export_wizard_views.xml',
         
         # Templates Web
         'views/website_templates.xml',
@@ -58,6 +70,10 @@
             'lagunes_cantine/static/src/css/lagunes_frontend.css',
             'lagunes_cantine/static/src/js/lagunes_commande.js',
         ],
+        'web.assets_backend': [
+            'lagunes_cantine/static/src/js/kitchen_board.js',
+            'lagunes_cantine/static/src/xml/kitchen_board.xml',
+        ],
     },
     'demo': [],
     'installable': True,
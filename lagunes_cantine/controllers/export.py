@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+import csv
+import io
+import tempfile
+
+from odoo import api, http, fields
+from odoo.http import request
+from odoo.modules.registry import Registry
+from odoo.tools.misc import xlsxwriter
+
+EXPORT_HEADER = ['Référence', 'Date', 'Employé', 'Plat', 'Options', 'Prix']
+CHUNK_SIZE = 64 * 1024
+
+
+class LagunesExportController(http.Controller):
+
+    @http.route('/cantine/export/commandes', type='http', auth='user')
+    def export_commandes(self, entreprise_id, date_from, date_to, file_format='csv', **kwargs):
+        """Relevé des commandes d'une entreprise (CSV ou XLSX, en flux)"""
+        entreprise_id = int(entreprise_id)
+        date_from = fields.Date.to_date(date_from)
+        date_to = fields.Date.to_date(date_to)
+
+        # L'export lit directement en SQL : vérifier les droits en amont
+        user = request.env.user
+        if not user.has_group('lagunes_cantine.group_lagunes_manager') \
+                and user.partner_id.commercial_partner_id.id != entreprise_id:
+            return request.not_found()
+
+        entreprise = request.env['res.partner'].sudo().browse(entreprise_id)
+        filename = f"commandes_{entreprise.name}_{date_from}_{date_to}"
+
+        stream_args = (request.db, request.env.uid, request.env.lang,
+                       entreprise_id, date_from, date_to)
+        if file_format == 'xlsx':
+            body = self._stream_xlsx(*stream_args)
+            content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            filename += '.xlsx'
+        else:
+            body = self._stream_csv(*stream_args)
+            content_type = 'text/csv; charset=utf-8'
+            filename += '.csv'
+
+        return request.make_response(body, headers=[
+            ('Content-Type', content_type),
+            ('Content-Disposition', http.content_disposition(filename)),
+        ])
+
+    def _iter_rows(self, dbname, uid, lang, entreprise_id, date_from, date_to):
+        """
+        Lignes d'export lues avec un curseur dédié
+
+        Le générateur est consommé après la fin de la requête HTTP :
+        il ouvre donc son propre curseur.
+        """
+        with Registry(dbname).cursor() as cr:
+            env = api.Environment(cr, uid, {'lang': lang})
+            yield from env['lagunes.commande']._iter_export_rows(
+                entreprise_id, date_from, date_to
+            )
+
+    def _stream_csv(self, *args):
+        """Flux CSV envoyé par blocs de CHUNK_SIZE octets"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=';')
+
+        buffer.write('\ufeff')  # BOM pour Excel
+        writer.writerow(EXPORT_HEADER)
+        for reference, date, employee_name, plat, options, prix in self._iter_rows(*args):
+            writer.writerow([reference, date, employee_name or '', plat, options or '', prix])
+            if buffer.tell() >= CHUNK_SIZE:
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue().encode('utf-8')
+
+    def _stream_xlsx(self, *args):
+        """
+        Flux XLSX : classeur écrit en mode constant_memory dans un fichier
+        temporaire, puis envoyé par blocs
+        """
+        with tempfile.NamedTemporaryFile(suffix='.xlsx') as tmp:
+            workbook = xlsxwriter.Workbook(tmp.name, {'constant_memory': True})
+            sheet = workbook.add_worksheet('Commandes')
+            date_format = workbook.add_format({'num_format': 'dd/mm/yyyy'})
+            bold = workbook.add_format({'bold': True})
+
+            sheet.write_row(0, 0, EXPORT_HEADER, bold)
+            row_index = 1
+            for reference, date, employee_name, plat, options, prix in self._iter_rows(*args):
+                sheet.write_string(row_index, 0, reference or '')
+                sheet.write_datetime(row_index, 1, date, date_format)
+                sheet.write_string(row_index, 2, employee_name or '')
+                sheet.write_string(row_index, 3, plat or '')
+                sheet.write_string(row_index, 4, options or '')
+                sheet.write_number(row_index, 5, prix or 0.0)
+                row_index += 1
+            workbook.close()
+
+            tmp.seek(0)
+            while True:
+                chunk = tmp.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
 
 from odoo import http, _
+from odoo.exceptions import ValidationError
 from odoo.http import request
+from odoo.addons.lagunes_cantine.models.lagunes_employee import normalize_employee_name
 from datetime import date, timedelta
 import json
+import psycopg2
 
 
 class LagunesCantineController(http.Controller):
@@ -26,15 +29,33 @@ class LagunesCantineController(http.Controller):
     @http.route('/cantine/verify_access', type='json', auth='public', website=True)
     def verify_access(self, access_code=None):
         """Vérifier l'accès avec le code entreprise (AJAX)"""
+        # Limitation des tentatives AVANT toute recherche de partenaire
+        throttle = request.env['lagunes.access.throttle'].sudo()
+        throttle_keys = throttle._make_keys(
+            ip_address=request.httprequest.remote_addr,
+            session_id=request.session.sid,
+        )
+        retry_after = throttle.check_locked(throttle_keys)
+        if retry_after:
+            return {
+                'success': False,
+                'message': f'Trop de tentatives. Veuillez réessayer dans {retry_after // 60 + 1} minute(s).',
+                'retry_after': retry_after,
+            }
+
         result = request.env['res.partner'].sudo().verify_cantine_access(
             access_code=access_code
         )
-        
+
         if result.get('success'):
+            # Seule la session est remise à zéro (voir reset)
+            throttle.reset(throttle._make_keys(session_id=request.session.sid))
             # Stocker les infos dans la session
             request.session['cantine_entreprise_id'] = result['entreprise_id']
             request.session['cantine_access_code'] = access_code
             request.session['cantine_access_time'] = str(date.today())
+        else:
+            throttle.register_failure(throttle_keys)
         
         return result
     
@@ -91,7 +112,7 @@ class LagunesCantineController(http.Controller):
     
     @http.route('/cantine/commander', type='json', auth='public', website=True, csrf=False)
     def commander_plat(self, entreprise_id, menu_id, plat_id, quantity=1, 
-                       option_ids=None, notes='', employee_name=None):
+                       option_ids=None, notes='', employee_name=None, idempotency_key=None):
         """Créer une commande (AJAX)"""
         # Vérifier l'accès
         if not self._check_session_access(entreprise_id):
@@ -105,17 +126,45 @@ class LagunesCantineController(http.Controller):
         # Force quantité à 1
         quantity = 1
         
-        # Vérifier si la personne a déjà commandé dans cette session
-        session_key = f'cantine_commanded_{entreprise_id}'
-        if request.session.get(session_key):
+        # Nom obligatoire : sans employé, la limite d'une commande par jour
+        # (index unique employé/date) ne s'appliquerait pas
+        employee_name = ' '.join((employee_name or '').split())
+        if not employee_name:
             return {
                 'success': False,
-                'message': 'Vous avez déjà passé une commande dans cette session. Une seule commande est autorisée par session.'
+                'message': 'Veuillez indiquer votre nom avant de commander.',
             }
         
+        # Clé d'idempotence obligatoire : générée par la page à chaque clic,
+        # elle seule permet de reconnaître une nouvelle tentative
+        idempotency_key = (idempotency_key or '').strip()[:64]
+        if not idempotency_key:
+            return {
+                'success': False,
+                'message': 'Cette page a expiré. Veuillez la recharger avant de commander.',
+            }
+        
+        # Nouvelle tentative d'une commande déjà enregistrée : la renvoyer
+        Commande = request.env['lagunes.commande'].sudo()
+        existing = Commande.search([
+            ('entreprise_id', '=', entreprise_id),
+            ('idempotency_key', '=', idempotency_key),
+        ], limit=1)
+        if existing:
+            # Clé réutilisée pour une autre commande (page revenue par
+            # « Précédent » sur une borne partagée) : ne pas renvoyer la
+            # commande d'un autre employé comme confirmée
+            if existing.plat_id.id != int(plat_id) or \
+                    (existing.employee_id.normalized_name or '') != normalize_employee_name(employee_name):
+                return {
+                    'success': False,
+                    'message': 'Cette page a expiré. Veuillez la recharger avant de commander.',
+                }
+            return self._commande_result(existing)
+        
         # Vérifier limite de commandes
         if entreprise.max_orders_per_day > 0:
-            count = request.env['lagunes.commande'].sudo().search_count([
+            count = Commande.search_count([
                 ('entreprise_id', '=', entreprise_id),
                 ('date', '=', date.today()),
                 ('state', '!=', 'cancelled')
@@ -138,26 +187,36 @@ class LagunesCantineController(http.Controller):
                 'date': date.today(),
                 'state': 'confirmed',
                 'facturation_state': 'not_invoiced',
-                'employee_name': (employee_name or '').strip(),
+                'employee_name': employee_name,
+                'idempotency_key': idempotency_key,
             }
             
             if option_ids:
                 vals['option_ids'] = [(6, 0, [int(oid) for oid in option_ids])]
+            
+            # Annuaire des employés : limite d'une commande par employé et par jour
+            vals['employee_id'] = request.env['lagunes.employee'].sudo()._get_or_create(
+                entreprise_id, employee_name
+            ).id
                 
-            commande = request.env['lagunes.commande'].sudo().create(vals)
+            commande = Commande._create_idempotent(vals)
+            if not commande:
+                return {
+                    'success': False,
+                    'message': 'Votre commande est en cours d\'enregistrement. Veuillez patienter.'
+                }
             
-            # Marquer la session comme ayant commandé
-            session_key = f'cantine_commanded_{entreprise_id}'
-            request.session[session_key] = True
+            return self._commande_result(commande)
             
+        except ValidationError as e:
             return {
-                'success': True,
-                'message': f'Commande confirmée ! Référence: {commande.reference}',
-                'commande_id': commande.id,
-                'reference': commande.reference,
-                'employee_name': commande.employee_name,
+                'success': False,
+                'message': str(e)
             }
-            
+        except psycopg2.OperationalError:
+            # Conflit de concurrence (sérialisation, verrou) : laisser Odoo
+            # annuler la transaction et rejouer la requête
+            raise
         except Exception as e:
             return {
                 'success': False,
@@ -201,20 +260,23 @@ class LagunesCantineController(http.Controller):
     @http.route('/cantine/logout', type='http', auth='public', website=True)
     def cantine_logout(self, **kwargs):
         """Déconnexion de la session cantine"""
-        entreprise_id = request.session.get('cantine_entreprise_id')
-        
         # Nettoyer toutes les clés de session
         request.session.pop('cantine_entreprise_id', None)
         request.session.pop('cantine_access_code', None)
         request.session.pop('cantine_access_time', None)
         
-        # Nettoyer aussi la clé de commande si elle existe
-        if entreprise_id:
-            session_key = f'cantine_commanded_{entreprise_id}'
-            request.session.pop(session_key, None)
-        
         return request.redirect('/cantine')
     
+    def _commande_result(self, commande):
+        """Réponse AJAX d'une commande enregistrée"""
+        return {
+            'success': True,
+            'message': f'Commande confirmée ! Référence: {commande.reference}',
+            'commande_id': commande.id,
+            'reference': commande.reference,
+            'employee_name': commande.employee_name,
+        }
+    
     def _check_session_access(self, entreprise_id):
         """Vérifier que la session est valide pour cette entreprise"""
         session_entreprise = request.session.get('cantine_entreprise_id')
@@ -1,8 +1,8 @@
 # -*- coding: utf-8 -*-
 
-from odoo import http
+from odoo import http, fields
 from odoo.http import request
-from odoo.addons.portal.controllers.portal import CustomerPortal
+from odoo.addons.portal.controllers.portal import CustomerPortal, pager as portal_pager
 
 
 class LagunesPortal(CustomerPortal):
@@ -11,6 +11,8 @@ class LagunesPortal(CustomerPortal):
     (optionnel - pour les clients ayant un compte Odoo)
     """
     
+    _items_per_page = 20
+    
     def _prepare_home_portal_values(self, counters):
         """Ajouter le compteur de commandes cantine"""
         values = super()._prepare_home_portal_values(counters)
@@ -18,47 +20,97 @@ class LagunesPortal(CustomerPortal):
         if 'commande_count' in counters:
             partner = request.env.user.partner_id
             if partner.is_cantine_client:
-                commande_count = request.env['lagunes.commande'].search_count([
-                    ('entreprise_id', '=', partner.commercial_partner_id.id)
-                ])
-                values['commande_count'] = commande_count
+                # COUNT indexé sur entreprise_id, sans charger les commandes
+                values['commande_count'] = partner.commercial_partner_id.commande_count
         
         return values
     
     @http.route(['/my/commandes', '/my/commandes/page/<int:page>'], 
                 type='http', auth='user', website=True)
     def portal_my_commandes(self, page=1, date_begin=None, date_end=None, 
-                            sortby=None, filterby=None, **kwargs):
+                            sortby=None, filterby=None, after=None, **kwargs):
         """Page portail pour voir les commandes cantine"""
         partner = request.env.user.partner_id
         
         if not partner.is_cantine_client:
             return request.redirect('/my')
         
-        domain = [('entreprise_id', '=', partner.commercial_partner_id.id)]
+        Commande = request.env['lagunes.commande']
+        entreprise = partner.commercial_partner_id
+        domain = [('entreprise_id', '=', entreprise.id)]
         
-        # Filtres par date
-        if date_begin and date_end:
-            domain += [('date', '>=', date_begin), ('date', '<=', date_end)]
+        # Filtres par date (appliqués en SQL)
+        if date_begin:
+            domain.append(('date', '>=', date_begin))
+        if date_end:
+            domain.append(('date', '<=', date_end))
         
         # Tri
         searchbar_sortings = {
-            'date': {'label': 'Date', 'order': 'date desc'},
-            'reference': {'label': 'Référence', 'order': 'reference'},
-            'state': {'label': 'Statut', 'order': 'state'},
+            'date': {'label': 'Date', 'order': 'date desc, id desc'},
+            'reference': {'label': 'Référence', 'order': 'reference desc'},
+            'state': {'label': 'Statut', 'order': 'state, date desc, id desc'},
         }
         
-        if not sortby:
+        if sortby not in searchbar_sortings:
             sortby = 'date'
         order = searchbar_sortings[sortby]['order']
         
-        # Pagination
-        commandes = request.env['lagunes.commande'].search(domain, order=order)
+        # Compteur : celui de l'entreprise sauf si un filtre de date est actif
+        if date_begin or date_end:
+            commande_count = Commande.search_count(domain)
+        else:
+            commande_count = entreprise.commande_count
+        
+        url_args = {'date_begin': date_begin, 'date_end': date_end, 'sortby': sortby}
+        pager = portal_pager(
+            url='/my/commandes',
+            url_args=url_args,
+            total=commande_count,
+            page=page,
+            step=self._items_per_page,
+        )
+        
+        # Pagination par clé (date, id) pour les pages profondes :
+        # pas d'OFFSET, l'index (entreprise_id, date, id) est parcouru directement
+        after_date, after_id = self._parse_keyset(after) if sortby == 'date' else (None, None)
+        if after_date:
+            commandes = Commande.search(domain + [
+                '|', ('date', '<', after_date),
+                '&', ('date', '=', after_date), ('id', '<', after_id),
+            ], order=order, limit=self._items_per_page)
+        else:
+            commandes = Commande.search(
+                domain, order=order, limit=self._items_per_page, offset=pager['offset']
+            )
+        
+        next_after = False
+        if sortby == 'date' and len(commandes) == self._items_per_page:
+            last = commandes[-1]
+            next_after = f"{fields.Date.to_string(last.date)}_{last.id}"
         
         return request.render('lagunes_cantine.portal_my_commandes', {
             'commandes': commandes,
             'page_name': 'commande',
             'default_url': '/my/commandes',
+            'pager': pager,
+            'keyset': bool(after_date),
+            'next_after': next_after,
+            'url_args': url_args,
+            'date_begin': date_begin,
+            'date_end': date_end,
             'searchbar_sortings': searchbar_sortings,
             'sortby': sortby,
         })
+    
+    def _parse_keyset(self, after):
+        """
+        Décoder le curseur de pagination 'AAAA-MM-JJ_id'
+        
+        :return: tuple (date, id) ou (None, None) si invalide
+        """
+        try:
+            after_date, after_id = (after or '').split('_')
+            return fields.Date.to_date(after_date), int(after_id)
+        except ValueError:
+            return None, None
@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    """Créer l'annuaire des employés à partir des noms saisis sur les commandes"""
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['lagunes.employee']._migrate_employee_names()
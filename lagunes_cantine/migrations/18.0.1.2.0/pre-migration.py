@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+
+from odoo.addons.migration_tools.tools.migration import batched_update
+
+
+def migrate(cr, version):
+    """Figer le supplément des options sur les commandes existantes"""
+    
+    # Créer la colonne avant le chargement du modèle : l'ORM ne recalcule
+    # pas alors le champ calculé sur tout l'historique
+    cr.execute("""
+        ALTER TABLE lagunes_commande
+        ADD COLUMN IF NOT EXISTS prix_options DOUBLE PRECISION
+    """)
+    
+    # Supplément déduit du total existant (prix catalogue des options non relu),
+    # par lots validés un par un : la table n'est jamais verrouillée en entier
+    batched_update(
+        cr, 'lagunes_commande',
+        set_sql="""prix_options = CASE
+                WHEN t.quantity > 0 THEN ROUND((t.prix_total / t.quantity - COALESCE(t.prix_unitaire, 0))::numeric, 2)
+                ELSE 0
+            END""",
+        where="t.prix_options IS NULL",
+        name='lagunes_commande_prix_options',
+    )
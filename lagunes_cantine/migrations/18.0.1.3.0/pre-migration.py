@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+import logging
+from datetime import date
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """
+    Rendre les menus compatibles avec l'exclusion GiST des périodes
+
+    La contrainte unique_active_menu_period ne peut pas être créée tant que
+    des menus actifs se chevauchent (l'ancienne vérification Python ne
+    détectait pas un menu englobant un autre) ; Odoo se contenterait alors
+    d'un avertissement. Les menus fautifs sont corrigés ici, avant le
+    chargement du modèle :
+    - date de fin antérieure au début : ramenée à la date de début ;
+    - chevauchement : le menu qui commence le plus tard est archivé.
+    """
+    cr.execute("""
+        UPDATE lagunes_menu
+           SET date_end = date
+         WHERE date_end < date
+     RETURNING id
+    """)
+    fixed = [row[0] for row in cr.fetchall()]
+    if fixed:
+        _logger.warning("Menus dont la date de fin précédait le début (corrigée) : %s", fixed)
+
+    cr.execute("""
+        SELECT id, entreprise_id, date, date_end
+          FROM lagunes_menu
+         WHERE active
+      ORDER BY entreprise_id, date, id
+    """)
+    to_archive = []
+    last_end = {}
+    for menu_id, entreprise_id, start, end in cr.fetchall():
+        end = end or date.max
+        # Triés par début : chevauche un menu conservé <=> début <= fin max conservée
+        if entreprise_id in last_end and start <= last_end[entreprise_id]:
+            to_archive.append(menu_id)
+        else:
+            last_end[entreprise_id] = max(end, last_end.get(entreprise_id, end))
+
+    if to_archive:
+        cr.execute("UPDATE lagunes_menu SET active = FALSE WHERE id = ANY(%s)", [to_archive])
+        _logger.warning(
+            "%s menu(s) actif(s) chevauchant un menu antérieur archivé(s) : %s",
+            len(to_archive), to_archive,
+        )
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+
+
+def migrate(cr, version):
+    """
+    Supprimer les colonnes des anciens compteurs stockés
+
+    commande_count / menu_count sont désormais calculés à la lecture
+    (COUNT groupé) : plus aucune ligne entreprise ou menu n'est réécrite
+    à chaque commande.
+    """
+    cr.execute("""
+        ALTER TABLE res_partner
+        DROP COLUMN IF EXISTS commande_count,
+        DROP COLUMN IF EXISTS menu_count
+    """)
+    cr.execute("ALTER TABLE lagunes_menu DROP COLUMN IF EXISTS commande_count")
@@ -3,7 +3,15 @@
 from . import res_partner
 from . import lagunes_menu
 from . import lagunes_menu_pack
+from . import lagunes_menu_duplicate_wizard
+from . import lagunes_menu_planner
 from . import lagunes_plat
+from . import lagunes_employee
 from . import lagunes_commande
+from . import lagunes_commande_forecast
 from . import lagunes_plat_option
 from . import product_template
+from . import lagunes_access_throttle
+from . import ir_websocket
+from . import lagunes_billing_wizard
+from . import lagunes_export_wizard
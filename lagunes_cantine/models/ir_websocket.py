@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models
+
+from .lagunes_commande import KITCHEN_CHANNEL
+
+
+class IrWebsocket(models.AbstractModel):
+    _inherit = 'ir.websocket'
+
+    def _build_bus_channel_list(self, channels):
+        """Abonner les utilisateurs cuisine au canal du tableau de production"""
+        channels = list(channels)
+        if self.env.uid and self.env.user.has_group('lagunes_cantine.group_lagunes_cuisine'):
+            channels.append(KITCHEN_CHANNEL)
+        return super()._build_bus_channel_list(channels)
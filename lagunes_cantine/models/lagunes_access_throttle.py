@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, api
+
+
+class LagunesAccessThrottle(models.AbstractModel):
+    """
+    Limitation des tentatives d'accès à la cantine (anti force brute)
+
+    Les tentatives échouées sont stockées dans des tables PostgreSQL UNLOGGED,
+    partagées par tous les workers. Une fenêtre glissante compte les échecs par
+    clé (IP et session) et déclenche un verrouillage temporaire.
+    """
+    _name = 'lagunes.access.throttle'
+    _description = 'Limitation des tentatives d\'accès cantine'
+
+    def init(self):
+        """Créer les tables de stockage (non journalisées)"""
+        self.env.cr.execute("""
+            CREATE UNLOGGED TABLE IF NOT EXISTS lagunes_access_attempt (
+                key VARCHAR NOT NULL,
+                attempt_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            )
+        """)
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS lagunes_access_attempt_key_at_idx
+            ON lagunes_access_attempt (key, attempt_at)
+        """)
+        self.env.cr.execute("""
+            CREATE UNLOGGED TABLE IF NOT EXISTS lagunes_access_lockout (
+                key VARCHAR PRIMARY KEY,
+                locked_until TIMESTAMPTZ NOT NULL,
+                rejected_count INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+
+    @api.model
+    def _get_throttle_params(self):
+        """
+        Paramètres de limitation (modifiables via les paramètres système)
+
+        :return: tuple (max_attempts, window_seconds, lockout_seconds)
+        """
+        icp = self.env['ir.config_parameter'].sudo()
+        max_attempts = int(icp.get_param('lagunes_cantine.access_max_attempts', 5))
+        window = int(icp.get_param('lagunes_cantine.access_window_seconds', 300))
+        lockout = int(icp.get_param('lagunes_cantine.access_lockout_seconds', 900))
+        return max_attempts, window, lockout
+
+    @api.model
+    def _make_keys(self, ip_address=None, session_id=None):
+        """Construire les clés de limitation (IP et session)"""
+        keys = []
+        if ip_address:
+            keys.append(f'ip:{ip_address}')
+        if session_id:
+            keys.append(f'sid:{session_id}')
+        return keys
+
+    @api.model
+    def check_locked(self, keys):
+        """
+        Vérifier si l'une des clés est verrouillée
+
+        Chaque rejet incrémente le compteur de la clé verrouillée.
+        Aucune requête sur les partenaires n'est faite ici.
+
+        :param keys: liste de clés (voir _make_keys)
+        :return: nombre de secondes avant déverrouillage (0 si libre)
+        """
+        if not keys:
+            return 0
+        self.env.cr.execute("""
+            UPDATE lagunes_access_lockout
+               SET rejected_count = rejected_count + 1
+             WHERE key IN %s
+               AND locked_until > NOW()
+         RETURNING CEIL(EXTRACT(EPOCH FROM locked_until - NOW()))
+        """, [tuple(keys)])
+        remaining = [row[0] for row in self.env.cr.fetchall()]
+        return int(max(remaining)) if remaining else 0
+
+    @api.model
+    def register_failure(self, keys):
+        """
+        Enregistrer un échec et verrouiller les clés ayant dépassé la limite
+
+        :param keys: liste de clés (voir _make_keys)
+        :return: nombre de secondes de verrouillage (0 si non verrouillé)
+        """
+        if not keys:
+            return 0
+        max_attempts, window, lockout = self._get_throttle_params()
+        self.env.cr.execute("""
+            INSERT INTO lagunes_access_attempt (key)
+            SELECT UNNEST(%s::varchar[])
+        """, [keys])
+        self.env.cr.execute("""
+            SELECT key
+              FROM lagunes_access_attempt
+             WHERE key IN %s
+               AND attempt_at > NOW() - make_interval(secs => %s)
+          GROUP BY key
+            HAVING COUNT(*) >= %s
+        """, [tuple(keys), window, max_attempts])
+        to_lock = [row[0] for row in self.env.cr.fetchall()]
+        if not to_lock:
+            return 0
+        self.env.cr.execute("""
+            INSERT INTO lagunes_access_lockout (key, locked_until)
+            SELECT UNNEST(%s::varchar[]), NOW() + make_interval(secs => %s)
+            ON CONFLICT (key) DO UPDATE
+               SET locked_until = EXCLUDED.locked_until
+        """, [to_lock, lockout])
+        return lockout
+
+    @api.model
+    def reset(self, keys):
+        """
+        Effacer les échecs de la session après un accès réussi
+
+        Les échecs par IP ne sont jamais effacés : ils expirent avec la
+        fenêtre glissante. Sinon, connaître un code valide suffirait à
+        remettre le compteur de l'IP à zéro entre deux séries d'essais.
+        """
+        session_keys = [key for key in keys if key.startswith('sid:')]
+        if not session_keys:
+            return
+        self.env.cr.execute(
+            "DELETE FROM lagunes_access_attempt WHERE key IN %s", [tuple(session_keys)]
+        )
+
+    @api.model
+    def get_rejected_stats(self):
+        """
+        Compteurs de tentatives rejetées par clé
+
+        :return: liste de dicts {key, locked_until, rejected_count}
+        """
+        self.env.cr.execute("""
+            SELECT key, locked_until, rejected_count
+              FROM lagunes_access_lockout
+          ORDER BY rejected_count DESC
+        """)
+        return self.env.cr.dictfetchall()
+
+    @api.model
+    def _cron_purge(self):
+        """Purger les tentatives hors fenêtre et les verrous expirés"""
+        window = self._get_throttle_params()[1]
+        self.env.cr.execute("""
+            DELETE FROM lagunes_access_attempt
+             WHERE attempt_at < NOW() - make_interval(secs => %s)
+        """, [window])
+        self.env.cr.execute("""
+            DELETE FROM lagunes_access_lockout
+             WHERE locked_until < NOW() - INTERVAL '1 day'
+        """)
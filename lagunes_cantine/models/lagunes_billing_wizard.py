@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api
+from odoo.exceptions import ValidationError
+from datetime import date
+from dateutil.relativedelta import relativedelta
+
+
+class LagunesBillingWizard(models.TransientModel):
+    _name = 'lagunes.billing.wizard'
+    _description = 'Assistant de facturation mensuelle consolidée'
+
+    def _default_date_from(self):
+        return date.today().replace(day=1) - relativedelta(months=1)
+
+    def _default_date_to(self):
+        return date.today().replace(day=1) - relativedelta(days=1)
+
+    date_from = fields.Date(string='Du', required=True, default=_default_date_from)
+    date_to = fields.Date(string='Au', required=True, default=_default_date_to)
+    entreprise_ids = fields.Many2many(
+        'res.partner',
+        string='Entreprises',
+        domain=[('is_cantine_client', '=', True)],
+        help='Laisser vide pour facturer toutes les entreprises'
+    )
+    create_invoices = fields.Boolean(
+        string='Créer les factures',
+        default=False,
+        help='Confirmer les commandes de vente et générer les factures immédiatement'
+    )
+    commande_count = fields.Integer(
+        string='Commandes à facturer',
+        compute='_compute_commande_count'
+    )
+
+    @api.depends('date_from', 'date_to', 'entreprise_ids')
+    def _compute_commande_count(self):
+        Commande = self.env['lagunes.commande']
+        for wizard in self:
+            if wizard.date_from and wizard.date_to:
+                wizard.commande_count = Commande.search_count(Commande._get_billable_domain(
+                    wizard.date_from, wizard.date_to, wizard.entreprise_ids.ids
+                ))
+            else:
+                wizard.commande_count = 0
+
+    def action_create_billing(self):
+        self.ensure_one()
+
+        if self.date_to < self.date_from:
+            raise ValidationError('La date de fin ne peut pas être antérieure à la date de début.')
+
+        sale_orders = self.env['lagunes.commande'].create_consolidated_sale_orders(
+            self.date_from,
+            self.date_to,
+            entreprise_ids=self.entreprise_ids.ids,
+            create_invoices=self.create_invoices,
+        )
+
+        if not sale_orders:
+            raise ValidationError('Aucune commande livrée non facturée sur cette période.')
+
+        return {
+            'type': 'ir.actions.act_window',
+            'name': 'Commandes de vente créées',
+            'res_model': 'sale.order',
+            'domain': [('id', 'in', sale_orders.ids)],
+            'view_mode': 'list,form',
+            'context': {'create': False}
+        }
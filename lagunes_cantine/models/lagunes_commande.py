@@ -1,8 +1,32 @@
 # -*- coding: utf-8 -*-
 
 from odoo import models, fields, api, _
-from odoo.exceptions import ValidationError
-from datetime import datetime
+from odoo.exceptions import UserError, ValidationError
+from odoo.tools.sql import create_index
+from collections import defaultdict
+from datetime import datetime, date
+import psycopg2
+
+# Index unique des clés d'idempotence (prise de commande web)
+IDEMPOTENCY_INDEX = 'lagunes_commande_idempotency_key_uniq'
+# Index unique : une commande web par employé et par jour
+EMPLOYEE_DAILY_INDEX = 'lagunes_commande_employee_daily_uniq'
+
+# États affichés sur le tableau de production cuisine
+KITCHEN_STATES = ('confirmed', 'preparing')
+KITCHEN_CHANNEL = 'lagunes_kitchen'
+# Champs qui déplacent une commande sur le tableau cuisine
+KITCHEN_BOARD_FIELDS = {'state', 'date', 'entreprise_id', 'plat_id', 'option_ids', 'quantity'}
+
+# Transitions autorisées : état cible -> états d'origine
+STATE_TRANSITIONS = {
+    'confirmed': ('draft',),
+    'preparing': ('confirmed',),
+    'ready': ('confirmed', 'preparing'),
+    'delivered': ('confirmed', 'preparing', 'ready'),
+    'cancelled': ('draft', 'confirmed', 'preparing', 'ready'),
+}
+
 
 
 class LagunesCommande(models.Model):
@@ -64,6 +88,13 @@ class LagunesCommande(models.Model):
         string='Options'
     )
     
+    options_label = fields.Char(
+        string='Combinaison d\'options',
+        compute='_compute_options_label',
+        store=True,
+        help='Options triées et concaténées (regroupement cuisine)'
+    )
+    
     notes = fields.Text(
         string='Notes / Instructions spéciales'
     )
@@ -73,6 +104,22 @@ class LagunesCommande(models.Model):
         help='Nom de l\'employé qui a passé la commande'
     )
     
+    employee_id = fields.Many2one(
+        'lagunes.employee',
+        string='Employé',
+        index=True,
+        ondelete='restrict',
+        domain="[('entreprise_id', '=', entreprise_id)]"
+    )
+    
+    idempotency_key = fields.Char(
+        string='Clé d\'idempotence',
+        copy=False,
+        readonly=True,
+        help='Clé envoyée par le site web : une nouvelle tentative avec la même clé '
+             'renvoie la commande déjà créée'
+    )
+    
     state = fields.Selection([
         ('draft', 'Brouillon'),
         ('confirmed', 'Confirmée'),
@@ -88,16 +135,30 @@ class LagunesCommande(models.Model):
         ('invoiced', 'Facturée'),
     ], string='État facturation', default='not_invoiced', required=True)
     
+    # Prix figés à la commande : une modification du catalogue ne
+    # recalcule pas l'historique (dépendances sur plat_id / option_ids seulement)
     prix_unitaire = fields.Float(
         string='Prix unitaire',
-        related='plat_id.prix_unitaire',
-        store=True
+        compute='_compute_prix_unitaire',
+        store=True,
+        readonly=False,
+        precompute=True
+    )
+    
+    prix_options = fields.Float(
+        string='Supplément options',
+        compute='_compute_prix_options',
+        store=True,
+        readonly=False,
+        precompute=True,
+        help='Somme des suppléments des options, par portion'
     )
     
     prix_total = fields.Float(
         string='Prix total',
         compute='_compute_prix_total',
-        store=True
+        store=True,
+        precompute=True
     )
     
     sale_order_id = fields.Many2one(
@@ -118,13 +179,30 @@ class LagunesCommande(models.Model):
         readonly=True
     )
     
-    @api.depends('quantity', 'prix_unitaire', 'option_ids')
+    @api.depends('plat_id')
+    def _compute_prix_unitaire(self):
+        """Prix du plat au moment de la commande"""
+        for commande in self:
+            commande.prix_unitaire = commande.plat_id.prix_unitaire
+    
+    @api.depends('option_ids')
+    def _compute_prix_options(self):
+        """Suppléments des options au moment de la commande"""
+        for commande in self:
+            commande.prix_options = sum(commande.option_ids.mapped('prix_supplementaire'))
+    
+    @api.depends('quantity', 'prix_unitaire', 'prix_options')
     def _compute_prix_total(self):
         """Calcul du prix total incluant les options"""
         for commande in self:
-            prix_base = commande.quantity * commande.prix_unitaire
-            prix_options = sum(commande.option_ids.mapped('prix_supplementaire'))
-            commande.prix_total = prix_base + (prix_options * commande.quantity)
+            commande.prix_total = commande.quantity * (commande.prix_unitaire + commande.prix_options)
+    
+    @api.depends('option_ids', 'option_ids.name')
+    def _compute_options_label(self):
+        """Clé de combinaison d'options (ordre alphabétique)"""
+        for commande in self:
+            names = sorted(commande.option_ids.mapped('name'))
+            commande.options_label = ', '.join(names) if names else False
     
     @api.model_create_multi
     def create(self, vals_list):
@@ -133,7 +211,89 @@ class LagunesCommande(models.Model):
             if vals.get('reference', _('Nouveau')) == _('Nouveau'):
                 vals['reference'] = self.env['ir.sequence'].next_by_code('lagunes.commande') or _('Nouveau')
         
-        return super(LagunesCommande, self).create(vals_list)
+        commandes = super(LagunesCommande, self).create(vals_list)
+        commandes._notify_kitchen_board(1)
+        return commandes
+    
+    def write(self, vals):
+        """
+        Notifier le tableau cuisine lorsqu'une commande y entre, en sort ou
+        y change de case
+        """
+        if not KITCHEN_BOARD_FIELDS & vals.keys():
+            return super(LagunesCommande, self).write(vals)
+        # Retrait avec les anciennes valeurs, ajout avec les nouvelles
+        # (le bus n'envoie les messages qu'à la validation, dans l'ordre)
+        self.filtered(lambda c: c.state in KITCHEN_STATES)._notify_kitchen_board(-1)
+        res = super(LagunesCommande, self).write(vals)
+        self._notify_kitchen_board(1)
+        return res
+    
+    def unlink(self):
+        """Retirer du tableau cuisine avant suppression"""
+        self.filtered(lambda c: c.state in KITCHEN_STATES)._notify_kitchen_board(-1)
+        return super(LagunesCommande, self).unlink()
+    
+    def init(self):
+        self._create_history_index()
+        self._create_idempotency_index()
+        self._create_employee_daily_index()
+    
+    def _create_history_index(self):
+        """Historique portail : pagination par clé (date, id) par entreprise"""
+        create_index(
+            self.env.cr,
+            'lagunes_commande_entreprise_date_id_index',
+            self._table,
+            ['entreprise_id', 'date DESC', 'id DESC'],
+        )
+    
+    def _create_idempotency_index(self):
+        """Prise de commande web : une seule commande par clé et par entreprise"""
+        self.env.cr.execute(f"""
+            CREATE UNIQUE INDEX IF NOT EXISTS {IDEMPOTENCY_INDEX}
+            ON lagunes_commande (entreprise_id, idempotency_key)
+            WHERE idempotency_key IS NOT NULL
+        """)
+    
+    def _create_employee_daily_index(self):
+        """
+        Limite d'une commande web par employé et par jour (commandes saisies
+        au back-office et historique antérieur non concernés)
+        """
+        self.env.cr.execute(f"""
+            CREATE UNIQUE INDEX IF NOT EXISTS {EMPLOYEE_DAILY_INDEX}
+            ON lagunes_commande (employee_id, date)
+            WHERE employee_id IS NOT NULL
+              AND idempotency_key IS NOT NULL
+              AND state != 'cancelled'
+        """)
+    
+    @api.model
+    def _create_idempotent(self, vals):
+        """
+        Créer une commande protégée par sa clé d'idempotence
+        
+        L'index unique (entreprise, clé) absorbe les doubles soumissions
+        simultanées : la seconde insertion échoue sans créer de doublon.
+        L'index (employé, date) refuse une seconde commande du même employé.
+        
+        :param vals: valeurs de la commande (avec 'idempotency_key')
+        :return: commande créée, ou vide si la clé est déjà utilisée par une
+                 commande concurrente
+        """
+        try:
+            with self.env.cr.savepoint():
+                return self.create(vals)
+        except psycopg2.errors.UniqueViolation as e:
+            if e.diag.constraint_name == EMPLOYEE_DAILY_INDEX:
+                employee = self.env['lagunes.employee'].browse(vals.get('employee_id'))
+                raise ValidationError(
+                    f"{employee.name} a déjà passé une commande aujourd'hui."
+                ) from None
+            if e.diag.constraint_name != IDEMPOTENCY_INDEX:
+                raise
+            return self.browse()
     
     @api.constrains('quantity')
     def _check_quantity(self):
@@ -181,28 +341,87 @@ class LagunesCommande(models.Model):
     
     def action_confirm(self):
         """Confirmer la commande"""
-        for commande in self:
-            commande.state = 'confirmed'
+        return self._transition_to('confirmed')
     
     def action_prepare(self):
         """Marquer comme en préparation"""
-        for commande in self:
-            commande.state = 'preparing'
+        return self._transition_to('preparing')
     
     def action_ready(self):
         """Marquer comme prêt"""
-        for commande in self:
-            commande.state = 'ready'
+        return self._transition_to('ready')
     
     def action_deliver(self):
         """Marquer comme livré"""
-        for commande in self:
-            commande.state = 'delivered'
+        return self._transition_to('delivered')
     
     def action_cancel(self):
         """Annuler la commande"""
-        for commande in self:
-            commande.state = 'cancelled'
+        return self._transition_to('cancelled')
+    
+    def _transition_to(self, target_state):
+        """
+        Appliquer un changement de statut à tout le recordset
+        
+        Les transitions sont validées sur l'ensemble, puis appliquées
+        en une seule écriture. Les commandes déjà dans l'état cible
+        sont ignorées.
+        
+        :param target_state: état cible (clé de STATE_TRANSITIONS)
+        :return: True
+        """
+        allowed = STATE_TRANSITIONS[target_state]
+        to_update = self.filtered(lambda c: c.state != target_state)
+        invalid = to_update.filtered(lambda c: c.state not in allowed)
+        if invalid:
+            states = dict(self._fields['state'].selection)
+            raise ValidationError(
+                f"Passage au statut « {states[target_state]} » impossible pour :\n"
+                + '\n'.join(f"- {c.reference} ({states[c.state]})" for c in invalid)
+            )
+        if to_update:
+            to_update.write({'state': target_state})
+        return True
+    
+    @api.model
+    def bulk_transition(self, target_state, domain=None):
+        """
+        Changer le statut de toutes les commandes éligibles d'un domaine
+        
+        Seules les commandes dont l'état autorise la transition sont
+        sélectionnées (filtre SQL), puis mises à jour en une écriture.
+        Ex: bulk_transition('delivered', [('entreprise_id', '=', 7),
+        ('date', '=', fields.Date.today())])
+        
+        :param target_state: état cible (clé de STATE_TRANSITIONS)
+        :param domain: domaine de recherche complémentaire
+        :return: nombre de commandes mises à jour
+        """
+        if target_state not in STATE_TRANSITIONS:
+            raise ValidationError(f"Statut cible inconnu : {target_state}")
+        
+        commandes = self.search(
+            list(domain or []) + [('state', 'in', STATE_TRANSITIONS[target_state])]
+        )
+        if commandes:
+            commandes.write({'state': target_state})
+        return len(commandes)
+    
+    @api.model
+    def bulk_transition_entreprise(self, target_state, entreprise_id, target_date=None):
+        """
+        Changer le statut des commandes d'une entreprise pour une journée
+        
+        :param target_state: état cible
+        :param entreprise_id: ID de l'entreprise
+        :param target_date: Date ciblée (aujourd'hui par défaut)
+        :return: nombre de commandes mises à jour
+        """
+        target_date = fields.Date.to_date(target_date) or date.today()
+        return self.bulk_transition(target_state, [
+            ('entreprise_id', '=', entreprise_id),
+            ('date', '=', target_date),
+        ])
     
     def create_sale_order(self):
         """
@@ -239,6 +458,154 @@ class LagunesCommande(models.Model):
             'target': 'current',
         }
     
+    @api.model
+    def _get_billable_domain(self, date_from, date_to, entreprise_ids=None):
+        """Domaine des commandes livrées non facturées d'une période"""
+        domain = [
+            ('date', '>=', date_from),
+            ('date', '<=', date_to),
+            ('state', '=', 'delivered'),
+            ('facturation_state', '=', 'not_invoiced'),
+            ('sale_order_id', '=', False),
+        ]
+        if entreprise_ids:
+            domain.append(('entreprise_id', 'in', list(entreprise_ids)))
+        return domain
+    
+    @api.model
+    def create_consolidated_sale_orders(self, date_from, date_to, entreprise_ids=None,
+                                        create_invoices=False):
+        """
+        Facturation consolidée : une commande de vente par entreprise
+        
+        Les commandes livrées et non facturées de la période sont regroupées
+        par entreprise, puis agrégées en lignes par plat + options + prix
+        unitaire. Toutes les commandes de vente (et leurs lignes) sont créées
+        en un seul appel, puis facturation_state est mis à jour par lot.
+        
+        :param date_from: Date de début de la période (incluse)
+        :param date_to: Date de fin de la période (incluse)
+        :param entreprise_ids: IDs des entreprises (toutes si vide)
+        :param create_invoices: Confirmer et facturer immédiatement
+        :return: recordset sale.order
+        """
+        commandes = self.search(
+            self._get_billable_domain(date_from, date_to, entreprise_ids),
+            order='entreprise_id, plat_id',
+        )
+        if not commandes:
+            return self.env['sale.order']
+        
+        # entreprise -> {(plat, options, prix unitaire): quantité}
+        lines_by_entreprise = defaultdict(lambda: defaultdict(int))
+        commande_ids_by_entreprise = defaultdict(list)
+        for commande in commandes:
+            unit_price = commande.prix_total / commande.quantity if commande.quantity else 0.0
+            key = (commande.plat_id, commande.options_label or '', unit_price)
+            lines_by_entreprise[commande.entreprise_id][key] += commande.quantity
+            commande_ids_by_entreprise[commande.entreprise_id].append(commande.id)
+        
+        period = f"{fields.Date.to_date(date_from).strftime('%d/%m/%Y')} - " \
+                 f"{fields.Date.to_date(date_to).strftime('%d/%m/%Y')}"
+        entreprises = list(lines_by_entreprise)
+        sale_orders = self.env['sale.order'].create([{
+            'partner_id': entreprise.id,
+            'date_order': datetime.now(),
+            'origin': f"Cantine {period}",
+            'order_line': [(0, 0, {
+                'product_id': plat.product_id.id,
+                'name': f"{plat.name} ({options_label})" if options_label else plat.name,
+                'product_uom_qty': quantity,
+                'price_unit': unit_price,
+                'tax_id': [(5, 0, 0)],  # Pas de TVA
+            }) for (plat, options_label, unit_price), quantity
+                in lines_by_entreprise[entreprise].items()],
+        } for entreprise in entreprises])
+        
+        if create_invoices:
+            sale_orders.action_confirm()
+            self._create_sale_invoices(sale_orders)
+        
+        # Facturées seulement si la facture existe réellement
+        for entreprise, sale_order in zip(entreprises, sale_orders):
+            self.browse(commande_ids_by_entreprise[entreprise]).write({
+                'sale_order_id': sale_order.id,
+                'facturation_state': 'invoiced' if sale_order.invoice_ids else 'to_invoice',
+            })
+        
+        return sale_orders
+    
+    @api.model
+    def _create_sale_invoices(self, sale_orders):
+        """
+        Facturer les commandes de vente confirmées
+        
+        Un seul appel pour le lot ; si une entreprise n'a rien à facturer
+        (produit facturé à la livraison par exemple), chaque commande de
+        vente est reprise séparément et celles sans facture sont ignorées.
+        
+        :return: factures créées
+        """
+        try:
+            with self.env.cr.savepoint():
+                return sale_orders._create_invoices()
+        except UserError:
+            pass
+        invoices = self.env['account.move']
+        for sale_order in sale_orders:
+            try:
+                with self.env.cr.savepoint():
+                    invoices |= sale_order._create_invoices()
+            except UserError:
+                continue
+        return invoices
+    
+    @api.model
+    def _iter_export_rows(self, entreprise_id, date_from, date_to, batch_size=5000):
+        """
+        Lignes d'export des commandes d'une entreprise sur une période
+        
+        Lecture SQL par lots (pagination par clé sur date, id) : la mémoire
+        reste constante quel que soit le volume exporté.
+        
+        :return: générateur de tuples
+                 (reference, date, employee_name, plat, options, prix_total)
+        """
+        lang = self.env.lang or 'en_US'
+        last_date, last_id = None, 0
+        while True:
+            self.env.cr.execute("""
+                SELECT c.reference,
+                       c.date,
+                       c.employee_name,
+                       COALESCE(p.name->>%(lang)s, p.name->>'en_US'),
+                       c.options_label,
+                       c.prix_total,
+                       c.id
+                  FROM lagunes_commande c
+                  JOIN lagunes_plat p ON p.id = c.plat_id
+                 WHERE c.entreprise_id = %(entreprise_id)s
+                   AND c.date BETWEEN %(date_from)s AND %(date_to)s
+                   AND c.state != 'cancelled'
+                   AND (%(last_date)s IS NULL OR (c.date, c.id) > (%(last_date)s, %(last_id)s))
+              ORDER BY c.date, c.id
+                 LIMIT %(limit)s
+            """, {
+                'lang': lang,
+                'entreprise_id': entreprise_id,
+                'date_from': date_from,
+                'date_to': date_to,
+                'last_date': last_date,
+                'last_id': last_id,
+                'limit': batch_size,
+            })
+            rows = self.env.cr.fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield row[:6]
+            last_date, last_id = rows[-1][1], rows[-1][6]
+    
     def _get_order_line_description(self):
         """Générer la description de la ligne de commande"""
         description = f"{self.plat_id.name}"
@@ -252,6 +619,78 @@ class LagunesCommande(models.Model):
         
         return description
     
+    @api.model
+    def get_kitchen_board(self, target_date=None):
+        """
+        Agrégation des commandes du jour pour le tableau de production cuisine
+        
+        Une seule requête _read_group par entreprise × plat × options.
+        
+        :param target_date: Date ciblée (aujourd'hui par défaut)
+        :return: dict {date, rows, forecast}
+        """
+        target_date = fields.Date.to_date(target_date) or date.today()
+        
+        groups = self._read_group(
+            domain=[
+                ('date', '=', target_date),
+                ('state', 'in', KITCHEN_STATES),
+            ],
+            groupby=['entreprise_id', 'plat_id', 'options_label'],
+            aggregates=['quantity:sum', '__count'],
+            order='entreprise_id, plat_id',
+        )
+        
+        rows = [{
+            'entreprise_id': entreprise.id,
+            'entreprise_name': entreprise.display_name,
+            'plat_id': plat.id,
+            'plat_name': plat.display_name,
+            'options_label': options_label or '',
+            'quantity': quantity,
+            'count': count,
+        } for entreprise, plat, options_label, quantity, count in groups]
+        
+        forecast = self.env['lagunes.commande.forecast'].get_plat_forecast(target_date)
+        plats = self.env['lagunes.plat'].browse(forecast)
+        
+        return {
+            'date': fields.Date.to_string(target_date),
+            'rows': rows,
+            'forecast': {plat.display_name: forecast[plat.id] for plat in plats},
+        }
+    
+    def _notify_kitchen_board(self, sign):
+        """
+        Envoyer les variations du tableau cuisine via le bus
+        
+        :param sign: 1 pour un ajout, -1 pour un retrait
+        """
+        deltas = defaultdict(lambda: [0, 0])
+        for commande in self:
+            if sign > 0 and commande.state not in KITCHEN_STATES:
+                continue
+            key = (commande.date, commande.entreprise_id, commande.plat_id,
+                   commande.options_label or '')
+            deltas[key][0] += sign * commande.quantity
+            deltas[key][1] += sign
+        
+        if not deltas:
+            return
+        
+        payload = [{
+            'date': fields.Date.to_string(commande_date),
+            'entreprise_id': entreprise.id,
+            'entreprise_name': entreprise.display_name,
+            'plat_id': plat.id,
+            'plat_name': plat.display_name,
+            'options_label': options_label,
+            'quantity': quantity,
+            'count': count,
+        } for (commande_date, entreprise, plat, options_label), (quantity, count) in deltas.items()]
+        
+        self.env['bus.bus']._sendone(KITCHEN_CHANNEL, 'lagunes_kitchen/update', payload)
+    
     def get_options_display(self):
         """Retourner les options pour affichage"""
         self.ensure_one()
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+
+from datetime import date, timedelta
+
+import numpy as np
+
+from odoo import models, fields, api
+
+
+class LagunesCommandeForecast(models.Model):
+    """
+    Prévision des portions par entreprise × plat × jour
+
+    Table de cache recalculée chaque nuit à partir de l'historique des
+    commandes : moyenne mobile pondérée par plat, corrigée d'un coefficient
+    saisonnier par jour de la semaine propre à chaque entreprise.
+    """
+    _name = 'lagunes.commande.forecast'
+    _description = 'Prévision de production cantine'
+    _order = 'date, entreprise_id, plat_id'
+
+    date = fields.Date(string='Date', required=True, index=True, readonly=True)
+    entreprise_id = fields.Many2one(
+        'res.partner',
+        string='Entreprise',
+        required=True,
+        ondelete='cascade',
+        readonly=True
+    )
+    plat_id = fields.Many2one(
+        'lagunes.plat',
+        string='Plat',
+        required=True,
+        ondelete='cascade',
+        readonly=True
+    )
+    predicted_quantity = fields.Integer(string='Portions prévues', readonly=True)
+    sample_size = fields.Integer(
+        string='Jours observés',
+        readonly=True,
+        help="Nombre de jours de service utilisés pour la prévision (0 : plat sans historique)"
+    )
+
+    _sql_constraints = [
+        ('unique_forecast', 'UNIQUE(date, entreprise_id, plat_id)',
+         'Une seule prévision par entreprise, plat et jour.'),
+    ]
+
+    @api.model
+    def _get_forecast_params(self):
+        """
+        Paramètres de prévision (modifiables via les paramètres système)
+
+        :return: tuple (history_weeks, horizon_days)
+        """
+        icp = self.env['ir.config_parameter'].sudo()
+        history_weeks = int(icp.get_param('lagunes_cantine.forecast_history_weeks', 8))
+        horizon_days = int(icp.get_param('lagunes_cantine.forecast_horizon_days', 7))
+        return history_weeks, horizon_days
+
+    @api.model
+    def _fetch_history(self, date_from, date_to):
+        """
+        Portions servies par entreprise × plat × jour (une requête)
+
+        :return: tableau numpy (entreprise_id, plat_id, week_index, weekday, quantity)
+        """
+        self.env['lagunes.commande'].flush_model(
+            ['entreprise_id', 'plat_id', 'date', 'quantity', 'state']
+        )
+        self.env.cr.execute("""
+            SELECT entreprise_id,
+                   plat_id,
+                   (date - %(date_from)s) / 7,
+                   EXTRACT(ISODOW FROM date)::int - 1,
+                   SUM(quantity)
+              FROM lagunes_commande
+             WHERE date >= %(date_from)s
+               AND date < %(date_to)s
+               AND state != 'cancelled'
+               AND plat_id IS NOT NULL
+          GROUP BY entreprise_id, plat_id, date
+        """, {'date_from': date_from, 'date_to': date_to})
+        return np.array(self.env.cr.fetchall(), dtype=np.int64).reshape(-1, 5)
+
+    @api.model
+    def _fetch_targets(self, date_from, date_to):
+        """
+        Cases à prévoir : chaque plat de chaque menu actif, jour par jour
+
+        :return: liste de tuples (entreprise_id, plat_id, date)
+        """
+        self.env['lagunes.menu'].flush_model(['entreprise_id', 'date', 'date_end', 'active', 'plat_ids'])
+        self.env.cr.execute("""
+            SELECT m.entreprise_id, rel.plat_id, day::date
+              FROM lagunes_menu m
+              JOIN lagunes_menu_plat_rel rel ON rel.menu_id = m.id
+        CROSS JOIN LATERAL generate_series(
+                       GREATEST(m.date, %(date_from)s),
+                       LEAST(m.date_end, %(date_to)s),
+                       interval '1 day'
+                   ) AS day
+             WHERE m.active
+               AND m.date <= %(date_to)s
+               AND m.date_end >= %(date_from)s
+        """, {'date_from': date_from, 'date_to': date_to})
+        return self.env.cr.fetchall()
+
+    @api.model
+    def _fit(self, history, history_weeks):
+        """
+        Ajuster le modèle sur l'historique
+
+        - niveau : moyenne mobile des portions par jour servi, pondérée
+          linéairement pour favoriser les semaines récentes ;
+        - saisonnalité : rapport entre la moyenne du jour de la semaine et la
+          moyenne globale de l'entreprise (1 si aucune observation).
+
+        :return: dict {levels, samples, seasonality, daily_totals}
+        """
+        series, series_index = np.unique(history[:, :2], axis=0, return_inverse=True)
+        series_index = series_index.reshape(-1)
+        entreprises, entreprise_index = np.unique(series[:, 0], return_inverse=True)
+
+        weeks, weekdays, quantities = history[:, 2], history[:, 3], history[:, 4]
+        demand = np.zeros((len(series), history_weeks, 7))
+        served = np.zeros((len(series), history_weeks, 7))
+        demand[series_index, weeks, weekdays] = quantities
+        served[series_index, weeks, weekdays] = 1
+
+        weights = np.arange(1, history_weeks + 1)[None, :, None]
+        samples = served.sum(axis=(1, 2))
+        levels = (demand * weights).sum(axis=(1, 2)) / (served * weights).sum(axis=(1, 2))
+
+        # Agrégation par entreprise (tous plats confondus)
+        entreprise_demand = np.zeros((len(entreprises), history_weeks, 7))
+        np.add.at(entreprise_demand, entreprise_index, demand)
+        entreprise_served = np.zeros((len(entreprises), history_weeks, 7))
+        np.maximum.at(entreprise_served, entreprise_index, served)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            daily_totals = entreprise_demand.sum(axis=(1, 2)) / entreprise_served.sum(axis=(1, 2))
+            weekday_means = entreprise_demand.sum(axis=1) / entreprise_served.sum(axis=1)
+            seasonality = np.nan_to_num(weekday_means / daily_totals[:, None], nan=1.0, posinf=1.0)
+
+        return {
+            'levels': {tuple(key): (level, sample) for key, level, sample in zip(series.tolist(), levels, samples)},
+            'seasonality': dict(zip(entreprises.tolist(), seasonality)),
+            'daily_totals': dict(zip(entreprises.tolist(), daily_totals)),
+        }
+
+    @api.model
+    def compute_forecast(self):
+        """
+        Recalculer les prévisions à venir (aujourd'hui + horizon)
+
+        :return: nombre de prévisions écrites
+        """
+        history_weeks, horizon_days = self._get_forecast_params()
+        today = date.today()
+        # L'historique commence un lundi pour aligner les semaines
+        history_start = today - timedelta(days=today.weekday() + 7 * history_weeks)
+        horizon_end = today + timedelta(days=horizon_days)
+
+        targets = self._fetch_targets(today, horizon_end)
+        history = self._fetch_history(history_start, today)
+        model = self._fit(history, history_weeks + 1) if len(history) else None
+
+        # Plats sans historique : part égale du volume quotidien de l'entreprise
+        plats_per_day = {}
+        for entreprise_id, plat_id, day in targets:
+            plats_per_day[entreprise_id, day] = plats_per_day.get((entreprise_id, day), 0) + 1
+
+        columns = ([], [], [], [], [])
+        for entreprise_id, plat_id, day in targets:
+            level, sample = model['levels'].get((entreprise_id, plat_id), (None, 0)) if model else (None, 0)
+            daily_total = model['daily_totals'].get(entreprise_id) if model else None
+            if level is None:
+                if daily_total is None or np.isnan(daily_total):
+                    continue
+                level = daily_total / plats_per_day[entreprise_id, day]
+            factor = model['seasonality'][entreprise_id][day.weekday()]
+            for column, value in zip(columns, (
+                entreprise_id, plat_id, day, int(np.rint(level * factor)), int(sample)
+            )):
+                column.append(value)
+
+        self.env.cr.execute("DELETE FROM lagunes_commande_forecast WHERE date >= %s", [today])
+        self.env.cr.execute("""
+            INSERT INTO lagunes_commande_forecast
+                   (entreprise_id, plat_id, date, predicted_quantity, sample_size,
+                    create_uid, write_uid, create_date, write_date)
+            SELECT entreprise_id, plat_id, day, quantity, sample,
+                   %s, %s, NOW() AT TIME ZONE 'UTC', NOW() AT TIME ZONE 'UTC'
+              FROM UNNEST(%s::int[], %s::int[], %s::date[], %s::int[], %s::int[])
+                   AS t(entreprise_id, plat_id, day, quantity, sample)
+        """, [self.env.uid, self.env.uid, *columns])
+        self.invalidate_model()
+        return len(columns[0])
+
+    @api.model
+    def get_plat_forecast(self, target_date):
+        """
+        Portions prévues par plat pour une date (toutes entreprises)
+
+        :return: dict {plat_id: portions}
+        """
+        groups = self._read_group(
+            domain=[('date', '=', target_date)],
+            groupby=['plat_id'],
+            aggregates=['predicted_quantity:sum'],
+        )
+        return {plat.id: quantity for plat, quantity in groups}
+
+    def action_compute_forecast(self):
+        self.compute_forecast()
+        return {'type': 'ir.actions.client', 'tag': 'reload'}
+
+    @api.model
+    def _cron_compute_forecast(self):
+        self.compute_forecast()
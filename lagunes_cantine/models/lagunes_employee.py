@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api
+
+# Normalisation du nom, identique en Python et en SQL :
+# espaces multiples réduits, espaces de début/fin supprimés, minuscules
+NORMALIZED_NAME_SQL = "lower(btrim(regexp_replace({}, '\\s+', ' ', 'g')))"
+
+
+def normalize_employee_name(name):
+    """Normaliser un nom d'employé (voir NORMALIZED_NAME_SQL)"""
+    return ' '.join((name or '').split()).lower()
+
+
+class LagunesEmployee(models.Model):
+    _name = 'lagunes.employee'
+    _description = 'Employé d\'une entreprise cliente'
+    _order = 'entreprise_id, name'
+
+    name = fields.Char(
+        string='Nom',
+        required=True
+    )
+
+    normalized_name = fields.Char(
+        string='Nom normalisé',
+        compute='_compute_normalized_name',
+        store=True,
+        readonly=True
+    )
+
+    badge = fields.Char(
+        string='Badge',
+        copy=False,
+        help='Numéro de badge de l\'employé (optionnel)'
+    )
+
+    entreprise_id = fields.Many2one(
+        'res.partner',
+        string='Entreprise',
+        required=True,
+        ondelete='cascade',
+        domain=[('is_cantine_client', '=', True)]
+    )
+
+    active = fields.Boolean(
+        string='Actif',
+        default=True,
+        help='Archiver l\'employé conserve l\'historique de ses commandes'
+    )
+
+    commande_ids = fields.One2many(
+        'lagunes.commande',
+        'employee_id',
+        string='Commandes'
+    )
+
+    _sql_constraints = [
+        ('unique_normalized_name', 'UNIQUE(entreprise_id, normalized_name)',
+         'Cet employé existe déjà pour cette entreprise.'),
+        ('unique_badge', 'UNIQUE(entreprise_id, badge)',
+         'Ce badge est déjà attribué dans cette entreprise.'),
+    ]
+
+    @api.depends('name')
+    def _compute_normalized_name(self):
+        for employee in self:
+            employee.normalized_name = normalize_employee_name(employee.name)
+
+    @api.model
+    def _get_or_create(self, entreprise_id, name):
+        """
+        Retrouver un employé par son nom normalisé, ou le créer
+
+        Création par INSERT ... ON CONFLICT : deux premières commandes
+        simultanées du même nom ne violent pas la contrainte d'unicité.
+        Si l'autre transaction a déjà validé l'employé (invisible dans
+        notre instantané), PostgreSQL lève une erreur de sérialisation et
+        Odoo rejoue la requête HTTP, qui trouve alors l'employé.
+
+        :return: employé (vide si le nom est vide)
+        """
+        normalized_name = normalize_employee_name(name)
+        if not normalized_name:
+            return self.browse()
+        domain = [
+            ('entreprise_id', '=', entreprise_id),
+            ('normalized_name', '=', normalized_name),
+        ]
+        employee = self.with_context(active_test=False).search(domain, limit=1)
+        if employee:
+            return employee
+        self.flush_model()
+        self.env.cr.execute("""
+            INSERT INTO lagunes_employee
+                   (name, normalized_name, entreprise_id, active,
+                    create_uid, write_uid, create_date, write_date)
+            VALUES (%(name)s, %(normalized_name)s, %(entreprise_id)s, TRUE,
+                    %(uid)s, %(uid)s, NOW() AT TIME ZONE 'UTC', NOW() AT TIME ZONE 'UTC')
+            ON CONFLICT (entreprise_id, normalized_name) DO NOTHING
+            RETURNING id
+        """, {
+            'name': ' '.join(name.split()),
+            'normalized_name': normalized_name,
+            'entreprise_id': entreprise_id,
+            'uid': self.env.uid,
+        })
+        row = self.env.cr.fetchone()
+        if row:
+            return self.browse(row[0])
+        return self.with_context(active_test=False).search(domain, limit=1)
+
+    @api.model
+    def _migrate_employee_names(self):
+        """
+        Créer les employés à partir des noms saisis sur les commandes
+
+        Ensembliste : un INSERT ... SELECT DISTINCT pour les employés,
+        un UPDATE ... FROM pour relier les commandes.
+
+        :return: tuple (employés créés, commandes reliées)
+        """
+        self.env['lagunes.commande'].flush_model(['employee_name', 'employee_id', 'entreprise_id'])
+        normalized = NORMALIZED_NAME_SQL.format('c.employee_name')
+        # Orthographe retenue : celle de la commande la plus récente
+        self.env.cr.execute(f"""
+            INSERT INTO lagunes_employee
+                   (name, normalized_name, entreprise_id, active,
+                    create_uid, write_uid, create_date, write_date)
+            SELECT DISTINCT ON (c.entreprise_id, {normalized})
+                   btrim(regexp_replace(c.employee_name, '\\s+', ' ', 'g')),
+                   {normalized},
+                   c.entreprise_id,
+                   TRUE,
+                   %(uid)s, %(uid)s, NOW() AT TIME ZONE 'UTC', NOW() AT TIME ZONE 'UTC'
+              FROM lagunes_commande c
+             WHERE {normalized} != ''
+               AND c.employee_id IS NULL
+          ORDER BY c.entreprise_id, {normalized}, c.id DESC
+            ON CONFLICT (entreprise_id, normalized_name) DO NOTHING
+        """, {'uid': self.env.uid})
+        created = self.env.cr.rowcount
+        self.env.cr.execute(f"""
+            UPDATE lagunes_commande c
+               SET employee_id = e.id
+              FROM lagunes_employee e
+             WHERE e.entreprise_id = c.entreprise_id
+               AND e.normalized_name = {normalized}
+               AND c.employee_id IS NULL
+        """)
+        linked = self.env.cr.rowcount
+        self.env.invalidate_all()
+        return created, linked
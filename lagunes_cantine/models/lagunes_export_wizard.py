@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields
+from odoo.exceptions import ValidationError
+from datetime import date
+from dateutil.relativedelta import relativedelta
+from urllib.parse import urlencode
+
+
+class LagunesExportWizard(models.TransientModel):
+    _name = 'lagunes.export.wizard'
+    _description = 'Assistant d\'export des commandes par entreprise'
+
+    def _default_date_from(self):
+        return date.today().replace(day=1) - relativedelta(months=1)
+
+    def _default_date_to(self):
+        return date.today().replace(day=1) - relativedelta(days=1)
+
+    entreprise_id = fields.Many2one(
+        'res.partner',
+        string='Entreprise',
+        required=True,
+        domain=[('is_cantine_client', '=', True)]
+    )
+    date_from = fields.Date(string='Du', required=True, default=_default_date_from)
+    date_to = fields.Date(string='Au', required=True, default=_default_date_to)
+    file_format = fields.Selection([
+        ('csv', 'CSV'),
+        ('xlsx', 'Excel (XLSX)'),
+    ], string='Format', default='xlsx', required=True)
+
+    def action_export(self):
+        self.ensure_one()
+
+        if self.date_to < self.date_from:
+            raise ValidationError('La date de fin ne peut pas être antérieure à la date de début.')
+
+        params = urlencode({
+            'entreprise_id': self.entreprise_id.id,
+            'date_from': fields.Date.to_string(self.date_from),
+            'date_to': fields.Date.to_string(self.date_to),
+            'file_format': self.file_format,
+        })
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f'/cantine/export/commandes?{params}',
+            'target': 'self',
+        }
@@ -97,6 +97,24 @@ class LagunesMenu(models.Model):
         string='Commandes'
     )
     
+    # CONTRAINTE STRICTE : un seul menu actif par entreprise et par période.
+    # Exclusion GiST sur la période (daterange inclusive) : atomique et sûre
+    # en concurrence ; l'index associé sert aussi à get_menu_for_entreprise.
+    _sql_constraints = [
+        ('check_date_end',
+         'CHECK(date_end >= date)',
+         'La date de fin ne peut pas être antérieure à la date de début.'),
+        ('unique_active_menu_period',
+         "EXCLUDE USING gist (entreprise_id WITH =, daterange(date, date_end, '[]') WITH &&) WHERE (active)",
+         'Un menu actif existe déjà pour cette entreprise sur cette période. '
+         'Les périodes de menu ne peuvent pas se chevaucher.'),
+    ]
+    
+    def _auto_init(self):
+        """Activer btree_gist (requis pour entreprise_id WITH = en GiST)"""
+        self.env.cr.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+        return super()._auto_init()
+    
     @api.depends('entreprise_id', 'date', 'date_end')
     def _compute_name(self):
         """Calcul automatique du nom du menu"""
@@ -125,11 +143,12 @@ class LagunesMenu(models.Model):
             menu.is_pack_based = (menu.menu_type == 'pack')
     
     def _compute_commande_count(self):
-        """Compter les commandes pour ce menu"""
+        """Compter les commandes des menus (une seule requête)"""
+        counts = dict(self.env['lagunes.commande']._read_group(
+            [('menu_id', 'in', self.ids)], ['menu_id'], ['__count'],
+        ))
         for menu in self:
-            menu.commande_count = self.env['lagunes.commande'].search_count([
-                ('menu_id', '=', menu.id)
-            ])
+            menu.commande_count = counts.get(menu._origin, 0)
     
     @api.onchange('menu_type')
     def _onchange_menu_type(self):
@@ -158,34 +177,6 @@ class LagunesMenu(models.Model):
                     'La date de fin ne peut pas être antérieure à la date de début.'
                 )
     
-    @api.constrains('entreprise_id', 'date', 'date_end', 'active')
-    def _check_unique_active_menu_per_day(self):
-        """
-        CONTRAINTE STRICTE: Un seul menu actif par entreprise et par période
-        Empêche les chevauchements
-        """
-        for menu in self:
-            if menu.active:
-                # Chercher d'autres menus actifs pour la même entreprise avec chevauchement
-                overlapping = self.search([
-                    ('id', '!=', menu.id),
-                    ('entreprise_id', '=', menu.entreprise_id.id),
-                    ('active', '=', True),
-                    '|', '&', 
-                    ('date', '<=', menu.date_end),
-                    ('date_end', '>=', menu.date),
-                    ('date', '<=', menu.date),
-                    ('date_end', '>=', menu.date)
-                ], limit=1)
-                
-                if overlapping:
-                    raise ValidationError(
-                        f"Un menu actif existe déjà pour {menu.entreprise_id.name} "
-                        f"pendant la période du {menu.date.strftime('%d/%m/%Y')} au {menu.date_end.strftime('%d/%m/%Y')}.\n\n"
-                        f"Menu existant: {overlapping.name}\n"
-                        f"Les périodes de menu ne peuvent pas se chevaucher."
-                    )
-    
     @api.constrains('plat_ids')
     def _check_plat_ids(self):
         """Vérifier qu'il y a au moins un plat dans le menu"""
@@ -207,12 +198,22 @@ class LagunesMenu(models.Model):
         if target_date is None:
             target_date = date.today()
         
-        return self.search([
-            ('entreprise_id', '=', entreprise_id),
-            ('date', '<=', target_date),
-            ('date_end', '>=', target_date),
-            ('active', '=', True)
-        ], limit=1)
+        # Requête indexée (GiST de la contrainte d'exclusion)
+        self.flush_model(['entreprise_id', 'date', 'date_end', 'active'])
+        self.env.cr.execute("""
+            SELECT id
+              FROM lagunes_menu
+             WHERE entreprise_id = %s
+               AND active
+               AND daterange(date, date_end, '[]') @> %s::date
+             LIMIT 1
+        """, [entreprise_id, target_date])
+        menu_ids = [row[0] for row in self.env.cr.fetchall()]
+        
+        if self.env.su or not menu_ids:
+            return self.browse(menu_ids)
+        # Appliquer les règles d'accès hors superutilisateur
+        return self.search([('id', 'in', menu_ids)])
     
     def action_view_commandes(self):
         """Action pour voir les commandes de ce menu"""
@@ -226,29 +227,26 @@ class LagunesMenu(models.Model):
             'context': {'default_menu_id': self.id}
         }
     
-    def duplicate_menu(self):
-        """Dupliquer ce menu pour une autre date"""
+    def duplicate_menu(self, target_date=None, target_entreprise_id=None):
+        """
+        Dupliquer ce menu pour une autre date et/ou une autre entreprise
+        
+        :param target_date: Date de début cible (lendemain par défaut)
+        :param target_entreprise_id: ID de l'entreprise cible (la même par défaut)
+        """
         self.ensure_one()
-        new_date = self.date + timedelta(days=1)
+        new_date = target_date or self.date + timedelta(days=1)
+        entreprise_id = target_entreprise_id or self.entreprise_id.id
         
-        # Vérifier qu'il n'existe pas déjà un menu actif pour cette date
-        existing = self.search([
-            ('entreprise_id', '=', self.entreprise_id.id),
-            ('date', '=', new_date),
-            ('active', '=', True)
-        ])
+        new_menu = self._duplicate_to_targets([(entreprise_id, new_date)])
         
-        if existing:
+        if not new_menu:
+            entreprise = self.env['res.partner'].browse(entreprise_id)
             raise ValidationError(
-                f"Un menu actif existe déjà pour {self.entreprise_id.name} "
+                f"Un menu actif existe déjà pour {entreprise.name} "
                 f"le {new_date.strftime('%d/%m/%Y')}."
             )
         
-        new_menu = self.copy(default={
-            'date': new_date,
-            'active': True
-        })
-        
         return {
             'type': 'ir.actions.act_window',
             'res_model': 'lagunes.menu',
@@ -257,6 +255,92 @@ class LagunesMenu(models.Model):
             'target': 'current'
         }
     
+    def _duplicate_to_targets(self, targets):
+        """
+        Moteur de duplication ensembliste
+        
+        Les cibles en conflit (entre elles ou avec un menu actif existant)
+        sont ignorées ; les chevauchements existants sont détectés en une
+        seule requête et tous les menus sont créés en un seul create().
+        La durée du menu source est conservée.
+        
+        :param targets: liste de tuples (entreprise_id, date de début)
+        :return: recordset des menus créés
+        """
+        self.ensure_one()
+        span = self.date_end - self.date
+        
+        # Conflits internes au lot : garder la première période par entreprise
+        intervals = []
+        last_end = {}
+        for entreprise_id, start in sorted(set(targets)):
+            if entreprise_id in last_end and start <= last_end[entreprise_id]:
+                continue
+            intervals.append((entreprise_id, start, start + span))
+            last_end[entreprise_id] = start + span
+        
+        if not intervals:
+            return self.browse()
+        
+        # Conflits avec les menus actifs existants : une seule requête
+        conflicts = self._find_overlapping_intervals(intervals)
+        
+        base_vals = self.copy_data()[0]
+        vals_list = [
+            dict(base_vals, entreprise_id=entreprise_id, date=start, date_end=end, active=True)
+            for index, (entreprise_id, start, end) in enumerate(intervals)
+            if index not in conflicts
+        ]
+        if not vals_list:
+            return self.browse()
+        
+        return self.create(vals_list)
+    
+    @api.model
+    def _find_overlapping_intervals(self, intervals):
+        """
+        Détecter en une requête les périodes en conflit avec un menu actif
+        
+        :param intervals: liste de tuples (entreprise_id, date_debut, date_fin)
+        :return: ensemble des index (dans intervals) en conflit
+        """
+        if not intervals:
+            return set()
+        self.flush_model(['entreprise_id', 'date', 'date_end', 'active'])
+        self.env.cr.execute("""
+            SELECT t.idx
+              FROM UNNEST(%s::int[], %s::date[], %s::date[])
+                   WITH ORDINALITY AS t(entreprise_id, date_start, date_end, idx)
+             WHERE EXISTS (
+                   SELECT 1
+                     FROM lagunes_menu m
+                    WHERE m.active
+                      AND m.entreprise_id = t.entreprise_id
+                      AND daterange(m.date, m.date_end, '[]')
+                          && daterange(t.date_start, t.date_end, '[]')
+             )
+        """, [
+            [i[0] for i in intervals],
+            [i[1] for i in intervals],
+            [i[2] for i in intervals],
+        ])
+        return {row[0] - 1 for row in self.env.cr.fetchall()}
+    
+    def action_open_duplicate_wizard(self):
+        """Ouvrir l'assistant de duplication (plusieurs dates / entreprises)"""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': 'Dupliquer le menu',
+            'res_model': 'lagunes.menu.duplicate.wizard',
+            'view_mode': 'form',
+            'target': 'new',
+            'context': {
+                'default_menu_id': self.id,
+                'default_target_entreprise_ids': [self.entreprise_id.id],
+            },
+        }
+    
     def toggle_active(self):
         """Activer/Désactiver le menu"""
         for menu in self:
@@ -29,6 +29,22 @@ class LagunesMenuDuplicateWizard(models.TransientModel):
         if self.menu_id:
             self.target_entreprise_ids = [(6, 0, [self.menu_id.entreprise_id.id])]
     
+    def _get_target_dates(self):
+        """Dates de début cibles selon le mode de duplication"""
+        self.ensure_one()
+        if self.duplicate_mode == 'single':
+            return [self.target_date]
+        
+        step = timedelta(days=7 if self.duplicate_mode == 'weekly' else 1)
+        dates = []
+        current_date = self.target_date
+        while current_date <= self.date_end:
+            # Mode hebdomadaire : uniquement les jours de semaine (lundi-vendredi)
+            if self.duplicate_mode == 'range' or current_date.weekday() < 5:
+                dates.append(current_date)
+            current_date += step
+        return dates
+    
     def action_duplicate(self):
         self.ensure_one()
         
@@ -38,52 +54,15 @@ class LagunesMenuDuplicateWizard(models.TransientModel):
         if self.duplicate_mode in ['range', 'weekly'] and not self.date_end:
             raise ValidationError("Veuillez spécifier une date de fin pour ce mode de duplication.")
         
-        created_menus = self.env['lagunes.menu']
+        target_dates = self._get_target_dates()
+        targets = [
+            (entreprise_id, target_date)
+            for entreprise_id in self.target_entreprise_ids.ids
+            for target_date in target_dates
+        ]
         
-        for entreprise in self.target_entreprise_ids:
-            if self.duplicate_mode == 'single':
-                try:
-                    new_menu = self.menu_id.duplicate_menu(
-                        target_date=self.target_date,
-                        target_entreprise_id=entreprise.id
-                    )
-                    if new_menu and new_menu.get('res_id'):
-                        created_menus |= self.env['lagunes.menu'].browse(new_menu['res_id'])
-                except ValidationError as e:
-                    # Menu déjà existant, on continue
-                    continue
-                    
-            elif self.duplicate_mode == 'range':
-                current_date = self.target_date
-                while current_date <= self.date_end:
-                    try:
-                        new_menu = self.menu_id.duplicate_menu(
-                            target_date=current_date,
-                            target_entreprise_id=entreprise.id
-                        )
-                        if new_menu and new_menu.get('res_id'):
-                            created_menus |= self.env['lagunes.menu'].browse(new_menu['res_id'])
-                    except ValidationError:
-                        # Menu déjà existant, on passe
-                        pass
-                    current_date += timedelta(days=1)
-                    
-            elif self.duplicate_mode == 'weekly':
-                current_date = self.target_date
-                while current_date <= self.date_end:
-                    # Ne dupliquer que pour les jours de semaine (lundi-vendredi)
-                    if current_date.weekday() < 5:  # 0-4 = Lundi-Vendredi
-                        try:
-                            new_menu = self.menu_id.duplicate_menu(
-                                target_date=current_date,
-                                target_entreprise_id=entreprise.id
-                            )
-                            if new_menu and new_menu.get('res_id'):
-                                created_menus |= self.env['lagunes.menu'].browse(new_menu['res_id'])
-                        except ValidationError:
-                            # Menu déjà existant, on passe
-                            pass
-                    current_date += timedelta(days=7)  # Sauter une semaine
+        # Menus déjà existants ignorés, création en un seul lot
+        created_menus = self.menu_id._duplicate_to_targets(targets)
         
         return {
             'type': 'ir.actions.act_window',
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api
+from odoo.exceptions import ValidationError
+from datetime import date, timedelta
+from dateutil.relativedelta import relativedelta
+
+
+class LagunesMenuPlanner(models.TransientModel):
+    """
+    Planificateur de menus par rotation de packs
+
+    Semaine 1 -> pack 1, semaine 2 -> pack 2, ... puis la rotation recommence.
+    Tous les menus de la période sont générés en un seul lot.
+    """
+    _name = 'lagunes.menu.planner'
+    _description = 'Planificateur de menus (rotation de packs)'
+
+    def _default_date_from(self):
+        today = date.today()
+        return today + timedelta(days=7 - today.weekday())
+
+    def _default_date_to(self):
+        return self._default_date_from() + relativedelta(months=3) - timedelta(days=1)
+
+    entreprise_ids = fields.Many2many(
+        'res.partner',
+        string='Entreprises',
+        required=True,
+        domain=[('is_cantine_client', '=', True)]
+    )
+    date_from = fields.Date(string='Du', required=True, default=_default_date_from)
+    date_to = fields.Date(string='Au', required=True, default=_default_date_to)
+    menu_duration = fields.Selection([
+        ('week', 'Un menu par semaine (lundi-vendredi)'),
+        ('day', 'Un menu par jour ouvré'),
+    ], string='Découpage', default='week', required=True)
+    on_conflict = fields.Selection([
+        ('skip', 'Ignorer les périodes déjà couvertes'),
+        ('error', 'Bloquer la génération'),
+    ], string='En cas de chevauchement', default='skip', required=True)
+    line_ids = fields.One2many(
+        'lagunes.menu.planner.line',
+        'planner_id',
+        string='Rotation des packs'
+    )
+
+    @api.constrains('date_from', 'date_to')
+    def _check_dates(self):
+        for planner in self:
+            if planner.date_to < planner.date_from:
+                raise ValidationError('La date de fin ne peut pas être antérieure à la date de début.')
+
+    def _get_schedule(self):
+        """
+        Calculer les périodes et le pack associé
+
+        :return: liste de tuples (date_debut, date_fin, pack)
+        """
+        self.ensure_one()
+        rotation = self.line_ids.sorted('sequence').mapped('pack_id')
+        schedule = []
+        # Semaines alignées sur le lundi de la date de début
+        week_start = self.date_from - timedelta(days=self.date_from.weekday())
+        week_index = 0
+        while week_start <= self.date_to:
+            pack = rotation[week_index % len(rotation)]
+            week_days = [
+                day for day in (week_start + timedelta(days=i) for i in range(5))
+                if self.date_from <= day <= self.date_to
+            ]
+            if week_days:
+                if self.menu_duration == 'week':
+                    schedule.append((week_days[0], week_days[-1], pack))
+                else:
+                    schedule.extend((day, day, pack) for day in week_days)
+            week_start += timedelta(days=7)
+            week_index += 1
+        return schedule
+
+    def action_generate(self):
+        self.ensure_one()
+
+        if not self.line_ids:
+            raise ValidationError('Veuillez définir au moins un pack dans la rotation.')
+
+        schedule = self._get_schedule()
+        planned = [
+            (entreprise_id, start, end, pack)
+            for entreprise_id in self.entreprise_ids.ids
+            for start, end, pack in schedule
+        ]
+        intervals = [plan[:3] for plan in planned]
+
+        # Pré-validation des chevauchements : une seule requête
+        Menu = self.env['lagunes.menu']
+        conflicts = Menu._find_overlapping_intervals(intervals)
+        if conflicts and self.on_conflict == 'error':
+            entreprise_id, start, end = intervals[min(conflicts)]
+            entreprise = self.env['res.partner'].browse(entreprise_id)
+            raise ValidationError(
+                f"{len(conflicts)} période(s) chevauchent des menus actifs existants.\n\n"
+                f"Premier conflit : {entreprise.name} du {start.strftime('%d/%m/%Y')} "
+                f"au {end.strftime('%d/%m/%Y')}."
+            )
+
+        vals_list = [{
+            'entreprise_id': entreprise_id,
+            'date': start,
+            'date_end': end,
+            'menu_type': 'pack',
+            'pack_id': pack.id,
+            'plat_ids': [(6, 0, pack.plat_ids.ids)],
+        } for index, (entreprise_id, start, end, pack) in enumerate(planned)
+            if index not in conflicts]
+
+        menus = Menu.create(vals_list)
+
+        return {
+            'type': 'ir.actions.act_window',
+            'name': 'Planning des menus',
+            'res_model': 'lagunes.menu',
+            'view_mode': 'calendar,list,form',
+            'domain': [('id', 'in', menus.ids)],
+            'context': {'initial_date': fields.Date.to_string(self.date_from)},
+        }
+
+
+class LagunesMenuPlannerLine(models.TransientModel):
+    _name = 'lagunes.menu.planner.line'
+    _description = 'Ligne de rotation du planificateur de menus'
+    _order = 'sequence, id'
+
+    planner_id = fields.Many2one('lagunes.menu.planner', required=True, ondelete='cascade')
+    sequence = fields.Integer(string='Ordre', default=10)
+    pack_id = fields.Many2one(
+        'lagunes.menu.pack',
+        string='Pack',
+        required=True,
+        domain=[('active', '=', True)]
+    )
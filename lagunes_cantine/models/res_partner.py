@@ -37,29 +37,39 @@ class ResPartner(models.Model):
         string='Commandes'
     )
     
+    cantine_employee_ids = fields.One2many(
+        'lagunes.employee',
+        'entreprise_id',
+        string='Employés'
+    )
+    
+    # Compteurs calculés à la lecture par un COUNT groupé : aucune ligne
+    # entreprise n'est réécrite à chaque commande (pas de contention)
     menu_count = fields.Integer(
         string='Nombre de menus',
-        compute='_compute_menu_count',
-        store=True
+        compute='_compute_menu_count'
     )
     
     commande_count = fields.Integer(
         string='Nombre de commandes',
-        compute='_compute_commande_count',
-        store=True
+        compute='_compute_commande_count'
     )
     
-    @api.depends('menu_ids')
     def _compute_menu_count(self):
-        """Compter les menus"""
+        """Compter les menus actifs (une seule requête)"""
+        counts = dict(self.env['lagunes.menu']._read_group(
+            [('entreprise_id', 'in', self.ids)], ['entreprise_id'], ['__count'],
+        ))
         for partner in self:
-            partner.menu_count = len(partner.menu_ids)
+            partner.menu_count = counts.get(partner._origin, 0)
     
-    @api.depends('commande_ids')
     def _compute_commande_count(self):
-        """Compter les commandes"""
+        """Compter les commandes (une seule requête)"""
+        counts = dict(self.env['lagunes.commande']._read_group(
+            [('entreprise_id', 'in', self.ids)], ['entreprise_id'], ['__count'],
+        ))
         for partner in self:
-            partner.commande_count = len(partner.commande_ids)
+            partner.commande_count = counts.get(partner._origin, 0)
     
     @api.constrains('cantine_access_code', 'is_cantine_client')
     def _check_access_code_required(self):
@@ -0,0 +1,122 @@
+/** @odoo-module **/
+
+import { Component, onWillStart, onWillUnmount, useState } from "@odoo/owl";
+import { registry } from "@web/core/registry";
+import { useService } from "@web/core/utils/hooks";
+
+/**
+ * Tableau de production cuisine
+ *
+ * Charge l'agrégation du jour en un seul appel, puis applique les
+ * variations reçues par le bus (aucun rechargement de page).
+ */
+export class KitchenBoard extends Component {
+    static template = "lagunes_cantine.KitchenBoard";
+    static props = ["*"];
+
+    setup() {
+        this.orm = useService("orm");
+        this.busService = this.env.services.bus_service;
+        this.state = useState({ date: false, rows: {}, forecast: {} });
+        this.onUpdate = this.onUpdate.bind(this);
+
+        onWillStart(async () => {
+            await this.load();
+            this.busService.subscribe("lagunes_kitchen/update", this.onUpdate);
+        });
+        onWillUnmount(() => {
+            this.busService.unsubscribe("lagunes_kitchen/update", this.onUpdate);
+        });
+    }
+
+    rowKey(row) {
+        return `${row.entreprise_id}-${row.plat_id}-${row.options_label}`;
+    }
+
+    async load() {
+        const board = await this.orm.call("lagunes.commande", "get_kitchen_board", []);
+        const rows = {};
+        for (const row of board.rows) {
+            rows[this.rowKey(row)] = row;
+        }
+        this.state.date = board.date;
+        this.state.rows = rows;
+        this.state.forecast = board.forecast;
+    }
+
+    onUpdate(deltas) {
+        for (const delta of deltas) {
+            if (delta.date !== this.state.date) {
+                continue;
+            }
+            const key = this.rowKey(delta);
+            const row = this.state.rows[key];
+            if (row) {
+                row.quantity += delta.quantity;
+                row.count += delta.count;
+                if (row.count <= 0) {
+                    delete this.state.rows[key];
+                }
+            } else if (delta.count > 0) {
+                this.state.rows[key] = { ...delta };
+            }
+        }
+    }
+
+    async transitionRow(row, targetState) {
+        await this.orm.call("lagunes.commande", "bulk_transition", [
+            targetState,
+            [
+                ["date", "=", this.state.date],
+                ["entreprise_id", "=", row.entreprise_id],
+                ["plat_id", "=", row.plat_id],
+                ["options_label", "=", row.options_label || false],
+            ],
+        ]);
+        await this.load();
+    }
+
+    async transitionEntreprise(entrepriseId, targetState) {
+        await this.orm.call("lagunes.commande", "bulk_transition_entreprise", [
+            targetState,
+            entrepriseId,
+            this.state.date,
+        ]);
+        await this.load();
+    }
+
+    get entreprises() {
+        const entreprises = {};
+        for (const row of Object.values(this.state.rows)) {
+            entreprises[row.entreprise_id] = row.entreprise_name;
+        }
+        return Object.entries(entreprises)
+            .map(([id, name]) => ({ id: parseInt(id), name }))
+            .sort((a, b) => a.name.localeCompare(b.name));
+    }
+
+    get sortedRows() {
+        return Object.values(this.state.rows).sort(
+            (a, b) =>
+                a.entreprise_name.localeCompare(b.entreprise_name) ||
+                a.plat_name.localeCompare(b.plat_name) ||
+                a.options_label.localeCompare(b.options_label)
+        );
+    }
+
+    get platTotals() {
+        const totals = {};
+        for (const [name, forecast] of Object.entries(this.state.forecast)) {
+            totals[name] = { name, quantity: 0, forecast };
+        }
+        for (const row of Object.values(this.state.rows)) {
+            totals[row.plat_name] ??= { name: row.plat_name, quantity: 0, forecast: false };
+            totals[row.plat_name].quantity += row.quantity;
+        }
+        return Object.values(totals).sort(
+            (a, b) => b.quantity - a.quantity || (b.forecast || 0) - (a.forecast || 0)
+        );
+    }
+}
+
+registry.category("actions").add("lagunes_kitchen_board", KitchenBoard);
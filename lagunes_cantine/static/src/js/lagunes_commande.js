@@ -41,17 +41,43 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Rendre la fonction accessible globalement
     window.showErrorModal = showErrorModal;
+    // Clé d'idempotence aléatoire (crypto.randomUUID exige HTTPS)
+    function newIdempotencyKey() {
+        const bytes = crypto.getRandomValues(new Uint8Array(16));
+        return Array.from(bytes, b => b.toString(16).padStart(2, '0')).join('');
+    }
+    
     // Gestion des boutons de commande
     const commanderButtons = document.querySelectorAll('.btn-commander');
     
+    // Page restaurée depuis le cache (« Précédent ») : nouvelles clés
+    window.addEventListener('pageshow', event => {
+        if (event.persisted) {
+            commanderButtons.forEach(button => delete button.dataset.idempotencyKey);
+        }
+    });
+    
     commanderButtons.forEach(button => {
         button.addEventListener('click', function() {
+            // Récupérer la carte du plat
+            const platCard = this.closest('.plat-card');
+
+            // Récupérer le nom employé (obligatoire : une commande par jour)
+            const employeeNameInput = platCard.querySelector('.plat-employee-name');
+            const employeeName = employeeNameInput ? employeeNameInput.value.trim() : '';
+            if (!employeeName) {
+                showErrorModal('Veuillez indiquer votre nom avant de commander.');
+                employeeNameInput?.focus();
+                return;
+            }
+
             const platId = parseInt(this.dataset.platId);
             const menuId = parseInt(this.dataset.menuId);
             const entrepriseId = parseInt(this.dataset.entrepriseId);
-            
-            // Récupérer la carte du plat
-            const platCard = this.closest('.plat-card');
+            // Une clé par commande, conservée seulement pour renvoyer la même
+            // commande après une erreur réseau (pas de doublon)
+            this.dataset.idempotencyKey ??= newIdempotencyKey();
+            const idempotencyKey = this.dataset.idempotencyKey;
             
             // Récupérer les options dynamiques
             const optionCheckboxes = platCard.querySelectorAll('.plat-option-checkbox:checked');
@@ -62,10 +88,6 @@ document.addEventListener('DOMContentLoaded', function() {
             
             // Récupérer les notes
             const notes = platCard.querySelector('.plat-notes').value || '';
-
-            // Récupérer le nom employé (optionnel)
-            const employeeNameInput = platCard.querySelector('.plat-employee-name');
-            const employeeName = employeeNameInput ? (employeeNameInput.value || '') : '';
             
             // Désactiver le bouton pendant le traitement
             button.disabled = true;
@@ -88,6 +110,7 @@ document.addEventListener('DOMContentLoaded', function() {
                         option_ids: optionIds,
                         notes: notes,
                         employee_name: employeeName,
+                        idempotency_key: idempotencyKey,
                     }
                 })
             })
@@ -97,7 +120,9 @@ document.addEventListener('DOMContentLoaded', function() {
                     // Succès - rediriger vers la page de confirmation
                     window.location.href = `/cantine/confirmation/${data.result.commande_id}`;
                 } else {
-                    // Erreur - afficher une modale Bootstrap
+                    // Erreur - afficher une modale Bootstrap ; refus du serveur :
+                    // la prochaine tentative est une nouvelle commande
+                    delete button.dataset.idempotencyKey;
                     const errorMessage = data.result?.message || 'Erreur lors de la commande';
                     showErrorModal(errorMessage);
                     button.disabled = false;
@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+
+from . import test_commande_flow
+from . import test_compteurs
+from . import test_employes
+from . import test_idempotence
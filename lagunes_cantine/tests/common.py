@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+from datetime import date
+
+from odoo.tests import TransactionCase
+
+
+class LagunesCantineCommon(TransactionCase):
+    """Entreprise cliente, plat et menu du jour partagés par les tests"""
+
+    ACCESS_CODE = 'TESTCANTINE01'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.entreprise = cls.env['res.partner'].create({
+            'name': 'Entreprise Test Cantine',
+            'is_cantine_client': True,
+            'cantine_access_code': cls.ACCESS_CODE,
+            'max_orders_per_day': 0,
+        })
+        cls.product = cls.env['product.product'].create({
+            'name': 'Attiéké poisson',
+            'type': 'consu',
+            'list_price': 2500.0,
+        })
+        cls.plat = cls.env['lagunes.plat'].create({
+            'name': 'Attiéké poisson',
+            'product_id': cls.product.id,
+        })
+        cls.menu = cls.env['lagunes.menu'].create({
+            'entreprise_id': cls.entreprise.id,
+            'date': date.today(),
+            'date_end': date.today(),
+            'plat_ids': [(6, 0, cls.plat.ids)],
+        })
+
+    @classmethod
+    def _create_commande(cls, **vals):
+        return cls.env['lagunes.commande'].create({
+            'entreprise_id': cls.entreprise.id,
+            'menu_id': cls.menu.id,
+            'plat_id': cls.plat.id,
+            **vals,
+        })
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import uuid
+from contextlib import nullcontext
+
+from odoo.tests import HttpCase, tagged
+
+from .common import LagunesCantineCommon
+
+_logger = logging.getLogger(__name__)
+
+# Tolérance par étape : absorbe un écart de préchargement, pas un N+1
+# (20 plats ou 30 commandes en plus coûteraient au moins 19 requêtes)
+QUERY_MARGIN = 2
+
+
+@tagged('post_install', '-at_install', 'lagunes_perf')
+class TestCommandeFlow(HttpCase, LagunesCantineCommon):
+    """Parcours employé complet : code d'accès → menu du jour → commande
+
+    Les budgets de requêtes sont relevés sur la base de test elle-même, cache
+    chaud, avec un seul plat et aucune commande, plus QUERY_MARGIN : ils ne
+    dépendent ni de la version d'Odoo ni des modules installés. Le parcours
+    est ensuite rejoué avec un menu de 20 plats (avec options) et un
+    historique de commandes ; une requête par plat, option ou commande (N+1)
+    fait échouer le test.
+    """
+
+    def _run_flow(self, employee_name, option_ids=(), budget=None):
+        """
+        Exécuter le parcours et relever le nombre de requêtes par étape
+
+        :param budget: dict {étape: requêtes}, vérifié par assertQueryCount
+        :return: dict {étape: requêtes relevées}
+        """
+        counts = {}
+
+        def measure(step, call):
+            guard = self.assertQueryCount(budget[step]) if budget else nullcontext()
+            with self.subTest(step=step), guard:
+                self.env.flush_all()
+                before = self.cr.sql_log_count
+                result = call()
+                counts[step] = self.cr.sql_log_count - before
+            return result
+
+        access = measure('verify_access', lambda: self.make_jsonrpc_request(
+            '/cantine/verify_access', {'access_code': self.ACCESS_CODE}))
+        self.assertTrue(access['success'], access.get('message'))
+        self.assertEqual(access['entreprise_id'], self.entreprise.id)
+
+        response = measure('menu', lambda: self.url_open(f'/cantine/menu/{self.entreprise.id}'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(f'data-plat-id="{self.plat.id}"', response.text)
+
+        result = measure('commander', lambda: self.make_jsonrpc_request('/cantine/commander', {
+            'entreprise_id': self.entreprise.id,
+            'menu_id': self.menu.id,
+            'plat_id': self.plat.id,
+            'option_ids': list(option_ids),
+            'employee_name': employee_name,
+            'idempotency_key': uuid.uuid4().hex,
+        }))
+        self.assertTrue(result['success'], result.get('message'))
+        commande = self.env['lagunes.commande'].browse(result['commande_id'])
+        self.assertEqual(commande.employee_id.name, employee_name)
+        return counts
+
+    def _grow_data(self, option):
+        """Menu de 20 plats à 6 options, 30 commandes déjà passées"""
+        options = option | self.env['lagunes.plat.option'].create([
+            {'name': f'Option perf {index}', 'prix_supplementaire': 100.0 * index}
+            for index in range(5)
+        ])
+        plats = self.env['lagunes.plat'].create([{
+            'name': f'Plat perf {index}',
+            'product_id': self.env['product.product'].create({
+                'name': f'Plat perf {index}', 'type': 'consu', 'list_price': 2000.0,
+            }).id,
+            'option_ids': [(6, 0, options.ids)],
+        } for index in range(19)])
+        self.plat.option_ids = options
+        self.menu.plat_ids |= plats
+        for index in range(30):
+            self._create_commande(employee_name=f'Historique {index}', option_ids=[(6, 0, options[:2].ids)])
+        return options
+
+    def test_commande_flow_query_count(self):
+        # Une option dès la mesure : l'écriture des options est à budget
+        option = self.env['lagunes.plat.option'].create({'name': 'Option perf', 'prix_supplementaire': 200.0})
+        self.plat.option_ids = option
+        # Premier parcours : chauffe des caches (ormcache, assets, vues)
+        self._run_flow('Employé Un', option_ids=option.ids)
+        counts = self._run_flow('Employé Deux', option_ids=option.ids)
+        _logger.info("Requêtes SQL par étape (cache chaud) : %s", counts)
+        budget = {step: count + QUERY_MARGIN for step, count in counts.items()}
+
+        options = self._grow_data(option)
+        self._run_flow('Employé Trois', option_ids=options.ids)
+        self._run_flow('Employé Quatre', option_ids=options.ids, budget=budget)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+from datetime import date, timedelta
+
+from odoo.tests import tagged
+
+from .common import LagunesCantineCommon
+
+
+@tagged('post_install', '-at_install')
+class TestCompteurs(LagunesCantineCommon):
+
+    def test_compteurs_commandes(self):
+        self._create_commande()
+        commande = self._create_commande()
+        self.assertEqual(self.menu.commande_count, 2)
+        self.assertEqual(self.entreprise.commande_count, 2)
+
+        commande.unlink()
+        self.env.invalidate_all()
+        self.assertEqual(self.menu.commande_count, 1)
+        self.assertEqual(self.entreprise.commande_count, 1)
+
+    def test_compteur_menus_actifs(self):
+        demain = date.today() + timedelta(days=1)
+        menu = self.env['lagunes.menu'].create({
+            'entreprise_id': self.entreprise.id,
+            'date': demain,
+            'date_end': demain,
+        })
+        self.assertEqual(self.entreprise.menu_count, 2)
+
+        menu.active = False
+        self.env.invalidate_all()
+        self.assertEqual(self.entreprise.menu_count, 1)
+
+    def test_commande_sans_ecriture_entreprise_ni_menu(self):
+        """Une commande ne réécrit ni la ligne entreprise ni la ligne menu
+
+        Toutes les commandes d'une entreprise visent ces deux lignes : les
+        mettre à jour à chaque commande provoquerait des échecs de
+        sérialisation aux heures de pointe.
+        """
+        # Toute mise à jour d'une ligne PostgreSQL en crée une nouvelle version (ctid)
+        self.env.flush_all()
+        versions = self._versions()
+        self._create_commande()
+        self.env.flush_all()
+        self.assertEqual(self._versions(), versions)
+
+    def _versions(self):
+        self.env.cr.execute("""
+            SELECT (SELECT ctid::text FROM res_partner WHERE id = %s),
+                   (SELECT ctid::text FROM lagunes_menu WHERE id = %s)
+        """, [self.entreprise.id, self.menu.id])
+        return self.env.cr.fetchone()
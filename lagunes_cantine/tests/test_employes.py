@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+
+import uuid
+
+from odoo.tests import HttpCase, tagged
+
+from .common import LagunesCantineCommon
+
+
+@tagged('post_install', '-at_install')
+class TestEmployes(HttpCase, LagunesCantineCommon):
+    """Annuaire des employés et limite d'une commande web par jour"""
+
+    def setUp(self):
+        super().setUp()
+        self.make_jsonrpc_request('/cantine/verify_access', {'access_code': self.ACCESS_CODE})
+
+    def _commander(self, employee_name):
+        return self.make_jsonrpc_request('/cantine/commander', {
+            'entreprise_id': self.entreprise.id,
+            'menu_id': self.menu.id,
+            'plat_id': self.plat.id,
+            'employee_name': employee_name,
+            'idempotency_key': uuid.uuid4().hex,
+        })
+
+    def test_get_or_create_par_nom_normalise(self):
+        Employee = self.env['lagunes.employee']
+        employee = Employee._get_or_create(self.entreprise.id, 'Jean  Kouassi')
+        self.assertTrue(employee)
+        self.assertEqual(Employee._get_or_create(self.entreprise.id, ' jean kouassi '), employee)
+
+    def test_une_commande_par_employe_et_par_jour(self):
+        self.assertTrue(self._commander('Jean Kouassi')['success'])
+        # Autre clé, même employé (casse et espaces différents) : refusée
+        second = self._commander('  JEAN   kouassi ')
+        self.assertFalse(second['success'])
+        self.assertIn("déjà passé une commande", second['message'])
+        self.assertTrue(self._commander('Awa Koné')['success'])
+
+    def test_nom_obligatoire(self):
+        for name in (None, '', '   '):
+            self.assertFalse(self._commander(name)['success'])
+        self.assertFalse(self.env['lagunes.commande'].search([('entreprise_id', '=', self.entreprise.id)]))
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+import uuid
+
+from odoo.tests import HttpCase, tagged
+
+from .common import LagunesCantineCommon
+
+
+@tagged('post_install', '-at_install')
+class TestIdempotence(HttpCase, LagunesCantineCommon):
+    """Clé d'idempotence de /cantine/commander"""
+
+    def setUp(self):
+        super().setUp()
+        self.make_jsonrpc_request('/cantine/verify_access', {'access_code': self.ACCESS_CODE})
+
+    def _commander(self, **params):
+        return self.make_jsonrpc_request('/cantine/commander', {
+            'entreprise_id': self.entreprise.id,
+            'menu_id': self.menu.id,
+            'plat_id': self.plat.id,
+            **params,
+        })
+
+    def test_nouvelle_tentative_renvoie_la_meme_commande(self):
+        params = {'employee_name': 'Employé Un', 'idempotency_key': uuid.uuid4().hex}
+        first = self._commander(**params)
+        retry = self._commander(**params)
+        self.assertTrue(first['success'], first.get('message'))
+        self.assertEqual(first['commande_id'], retry['commande_id'])
+        self.assertEqual(self.env['lagunes.commande'].search_count([
+            ('idempotency_key', '=', params['idempotency_key']),
+        ]), 1)
+
+    def test_cle_reutilisee_par_un_autre_employe_refusee(self):
+        """Page revenue par « Précédent » sur une borne partagée"""
+        key = uuid.uuid4().hex
+        self._commander(employee_name='Employé Un', idempotency_key=key)
+        reused = self._commander(employee_name='Employé Deux', idempotency_key=key)
+        self.assertFalse(reused['success'])
+
+    def test_cle_obligatoire(self):
+        for key in (None, '', '   '):
+            result = self._commander(employee_name='Employé Un', idempotency_key=key)
+            self.assertFalse(result['success'])
+        self.assertFalse(self.env['lagunes.commande'].search([('entreprise_id', '=', self.entreprise.id)]))
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+Banc d'essai de la prise de commande cantine
+
+Simule N entreprises × M employés qui, chacun dans sa propre session :
+  1. s'identifient avec le code d'accès (/cantine/verify_access)
+  2. chargent le menu du jour (/cantine/menu/<id>)
+  3. passent une commande (/cantine/commander)
+
+Les parcours sont exécutés en parallèle. Le script affiche les latences
+p50/p95/p99 par point d'entrée et, si le journal du serveur Odoo est fourni
+(--odoo-log), le nombre de requêtes SQL par appel, relevé dans les lignes
+werkzeug (« ... 200 - <requêtes> <temps SQL> <temps restant> »).
+
+À lancer contre une base de test : chaque employé simulé crée une commande
+et une fiche employé. Les entreprises doivent avoir un menu actif du jour
+et une limite de commandes par jour suffisante (0 = illimité).
+
+Exemple :
+    python3 benchmark_commandes.py --url http://localhost:8069 \\
+        --access-code ACME2026 --access-code LAGUNES01 \\
+        --employees 50 --concurrency 20 --odoo-log /var/log/odoo/odoo.log \\
+        --max-p95 0.5
+"""
+
+import argparse
+import http.cookiejar
+import json
+import math
+import os
+import re
+import sys
+import time
+import urllib.request
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+MENU_ATTR_RE = {
+    'menu_id': re.compile(r'data-menu-id="(\d+)"'),
+    'plat_id': re.compile(r'data-plat-id="(\d+)"'),
+}
+WERKZEUG_LOG_RE = re.compile(
+    r'"(?:GET|POST) (?P<path>\S+) HTTP/[\d.]+" (?P<status>\d{3}) - '
+    r'(?P<queries>\d+) (?P<query_time>[\d.]+) (?P<remaining_time>[\d.]+)'
+)
+ENDPOINTS = ('/cantine/verify_access', '/cantine/menu/<id>', '/cantine/commander')
+
+
+def percentile(values, pct):
+    """Percentile par rang le plus proche"""
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def endpoint_of(path):
+    path = path.split('?')[0]
+    if re.fullmatch(r'/cantine/menu/\d+', path):
+        return '/cantine/menu/<id>'
+    return path
+
+
+class EmployeeSession:
+    """Un employé simulé : une session HTTP (cookies) dédiée"""
+
+    def __init__(self, base_url, timings):
+        self.base_url = base_url.rstrip('/')
+        self.timings = timings
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar())
+        )
+
+    def _request(self, endpoint, path, payload=None):
+        data = headers = None
+        if payload is not None:
+            data = json.dumps({'jsonrpc': '2.0', 'method': 'call', 'params': payload}).encode()
+            headers = {'Content-Type': 'application/json'}
+        request = urllib.request.Request(self.base_url + path, data=data, headers=headers or {})
+        start = time.perf_counter()
+        with self.opener.open(request, timeout=60) as response:
+            body = response.read()
+        self.timings[endpoint].append(time.perf_counter() - start)
+        return body
+
+    def json_call(self, path, **params):
+        result = json.loads(self._request(path, path, params))
+        if 'error' in result:
+            raise RuntimeError(result['error'].get('data', {}).get('message') or result['error'])
+        return result['result']
+
+    def run(self, access_code, employee_name):
+        """Parcours complet ; renvoie un message d'erreur ou None"""
+        access = self.json_call('/cantine/verify_access', access_code=access_code)
+        if not access.get('success'):
+            return f"accès refusé ({access_code}) : {access.get('message')}"
+        entreprise_id = access['entreprise_id']
+
+        html = self._request('/cantine/menu/<id>', f'/cantine/menu/{entreprise_id}').decode()
+        attrs = {name: regex.search(html) for name, regex in MENU_ATTR_RE.items()}
+        if not all(attrs.values()):
+            return f"aucun plat commandable pour l'entreprise {entreprise_id}"
+
+        order = self.json_call(
+            '/cantine/commander',
+            entreprise_id=entreprise_id,
+            menu_id=int(attrs['menu_id'].group(1)),
+            plat_id=int(attrs['plat_id'].group(1)),
+            employee_name=employee_name,
+            # Générée au clic par le navigateur
+            idempotency_key=uuid.uuid4().hex,
+        )
+        if not order.get('success'):
+            return f"commande refusée : {order.get('message')}"
+        return None
+
+
+def read_sql_counts(log_path, offset):
+    """Requêtes SQL par point d'entrée, lues dans le journal Odoo à partir de offset"""
+    counts = defaultdict(list)
+    with open(log_path, encoding='utf-8', errors='replace') as log_file:
+        log_file.seek(offset)
+        for line in log_file:
+            match = WERKZEUG_LOG_RE.search(line)
+            if match and endpoint_of(match['path']) in ENDPOINTS:
+                counts[endpoint_of(match['path'])].append(int(match['queries']))
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--url', default='http://localhost:8069', help='URL du serveur Odoo')
+    parser.add_argument('--access-code', action='append', required=True,
+                        help="Code d'accès d'une entreprise (répéter pour N entreprises)")
+    parser.add_argument('--employees', type=int, default=10, help='Employés simulés par entreprise')
+    parser.add_argument('--concurrency', type=int, default=10, help='Parcours simultanés')
+    parser.add_argument('--odoo-log', help='Journal du serveur Odoo (comptage des requêtes SQL)')
+    parser.add_argument('--max-p95', type=float,
+                        help='Seuil p95 en secondes : code de sortie 1 si dépassé')
+    args = parser.parse_args()
+
+    log_offset = os.path.getsize(args.odoo_log) if args.odoo_log else 0
+    run_id = uuid.uuid4().hex[:6]
+    timings = {endpoint: [] for endpoint in ENDPOINTS}
+    flows = [
+        (code, f'bench-{run_id}-{company_index}-{employee_index}')
+        for company_index, code in enumerate(args.access_code)
+        for employee_index in range(args.employees)
+    ]
+
+    def run_flow(flow):
+        try:
+            return EmployeeSession(args.url, timings).run(*flow)
+        except Exception as e:
+            return str(e)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        errors = [error for error in executor.map(run_flow, flows) if error]
+    elapsed = time.perf_counter() - start
+
+    orders = len(flows) - len(errors)
+    print(f"{len(flows)} parcours en {elapsed:.1f} s "
+          f"({orders / elapsed:.1f} commandes/s, {len(errors)} échec(s))\n")
+
+    sql_counts = read_sql_counts(args.odoo_log, log_offset) if args.odoo_log else {}
+    header = "Point d'entrée"
+    print(f"{header:<26}{'appels':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'SQL p50':>9}{'SQL max':>9}")
+    regression = False
+    for endpoint in ENDPOINTS:
+        values = timings.get(endpoint, [])
+        queries = sql_counts.get(endpoint, [])
+        p95 = percentile(values, 95)
+        regression |= bool(args.max_p95 and p95 > args.max_p95)
+        print(f"{endpoint:<26}{len(values):>8}"
+              f"{percentile(values, 50) * 1000:>7.0f}ms{p95 * 1000:>7.0f}ms"
+              f"{percentile(values, 99) * 1000:>7.0f}ms"
+              f"{percentile(queries, 50) if queries else '-':>9}{max(queries) if queries else '-':>9}")
+
+    for error in sorted(set(errors))[:10]:
+        print(f"  ! {error}")
+
+    if regression:
+        print(f"\np95 supérieur au seuil de {args.max_p95:.3f} s")
+    return 1 if regression or errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,6 +1,6 @@
 {
     'name': 'Location de Véhicules',
-    'version': '2.0',
+    'version': '2.2',
     'category': 'Services/Location',
     'summary': 'Gestion complète des locations de véhicules avec facturation',
     'description': """
@@ -36,14 +36,21 @@
         'account',          # Module comptabilité pour les factures
         'mail',             # Module de messagerie pour le chatter
         'web',              # Module web pour les vues
+        'migration_tools',  # Scripts de migration par lots
     ],
     'data': [
         
         'security/location_security.xml',
         'security/ir.model.access.csv',
         'data/sequence.xml',
+        'data/mail_activity_data.xml',
+        'data/cron.xml',
         'views/vehicule_views.xml',
         'views/location_views.xml',
+        'views/reservation_views.xml',
+        'views/facturation_views.xml',
+        'views/impression_views.xml',
+        'views/telemetrie_views.xml',
         'views/menus.xml',
         'reports/report_contract.xml',
         'reports/report_templates.xml',
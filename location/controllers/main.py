@@ -0,0 +1,32 @@
+import hmac
+import json
+
+from odoo import http
+from odoo.exceptions import ValidationError
+from odoo.http import request
+
+
+class LocationTelemetrieController(http.Controller):
+
+    @http.route('/location/telemetrie', type='http', auth='public', methods=['POST'], csrf=False)
+    def telemetrie(self, **kwargs):
+        """Réception d'un lot de relevés de la passerelle télématique
+
+        Corps JSON : {"releves": [{"immatriculation", "horodatage",
+        "kilometrage", "carburant"}, ...]}, jeton dans l'en-tête
+        X-Telemetrie-Token (paramètre système location.telemetrie_token).
+        """
+        token = request.env['ir.config_parameter'].sudo().get_param('location.telemetrie_token')
+        if not token or not hmac.compare_digest(
+            request.httprequest.headers.get('X-Telemetrie-Token', ''), token
+        ):
+            return request.make_json_response({'error': 'Jeton invalide'}, status=403)
+
+        try:
+            releves = json.loads(request.httprequest.get_data())['releves']
+            result = request.env['location.telemetrie'].sudo()._ingest(releves)
+        except (ValueError, KeyError, TypeError) as e:
+            return request.make_json_response({'error': f'Corps JSON invalide : {e}'}, status=400)
+        except ValidationError as e:
+            return request.make_json_response({'error': str(e)}, status=400)
+        return request.make_json_response(result)
@@ -1,44 +1,46 @@
+from odoo.addons.migration_tools.tools.migration import batched_update, column_exists, unique_codes
+
+
 def migrate(cr, version):
     """Migrer le champ marque (Char) vers marque_id (Many2one)"""
     
-    # Vérifier si la colonne marque existe
+    # Reprise : colonne déjà renommée lors d'une tentative interrompue
+    if column_exists(cr, 'location_vehicule', 'marque'):
+        cr.execute("ALTER TABLE location_vehicule RENAME COLUMN marque TO marque_temp")
+        cr.commit()
+    if not column_exists(cr, 'location_vehicule', 'marque_temp'):
+        return
+
+    # Créer les marques manquantes, avec un code unique (contrainte code_unique)
+    cr.execute("SELECT code FROM location_marque")
+    existing_codes = [code for code, in cr.fetchall()]
     cr.execute("""
-        SELECT EXISTS (
-            SELECT 1 FROM information_schema.columns 
-            WHERE table_name='location_vehicule' 
-            AND column_name='marque'
-        )
+        SELECT DISTINCT v.marque_temp
+          FROM location_vehicule v
+         WHERE v.marque_temp IS NOT NULL
+           AND NOT EXISTS (SELECT 1 FROM location_marque m WHERE m.name = v.marque_temp)
+      ORDER BY v.marque_temp
     """)
+    codes = unique_codes([name for name, in cr.fetchall()], existing_codes)
+    cr.execute("""
+        INSERT INTO location_marque (name, code, actif, create_date, write_date, create_uid, write_uid)
+        SELECT name, code, TRUE,
+               NOW() AT TIME ZONE 'UTC', NOW() AT TIME ZONE 'UTC', 1, 1
+          FROM UNNEST(%s::varchar[], %s::varchar[]) AS t(name, code)
+        ON CONFLICT (name) DO NOTHING
+    """, [list(codes), list(codes.values())])
     
-    if cr.fetchone()[0]:
-        # Renommer la colonne
-        cr.execute("ALTER TABLE location_vehicule RENAME COLUMN marque TO marque_temp")
-        
-        # Créer les marques automatiquement si elles n'existent pas
-        cr.execute("""
-            INSERT INTO location_marque (name, code, actif, create_date, write_date, create_uid, write_uid)
-            SELECT DISTINCT marque_temp, 
-                   UPPER(SUBSTRING(marque_temp, 1, 3)),
-                   TRUE,
-                   NOW(),
-                   NOW(),
-                   1,
-                   1
-            FROM location_vehicule
-            WHERE marque_temp IS NOT NULL
-            ON CONFLICT (name) DO NOTHING
-        """)
-        
-        # Ajouter la colonne marque_id
-        cr.execute("ALTER TABLE location_vehicule ADD COLUMN marque_id INTEGER")
-        
-        # Mettre à jour les références
-        cr.execute("""
-            UPDATE location_vehicule v
-            SET marque_id = m.id
-            FROM location_marque m
-            WHERE v.marque_temp = m.name
-        """)
-        
-        # Supprimer la colonne temporaire
-        cr.execute("ALTER TABLE location_vehicule DROP COLUMN marque_temp")
+    # Ajouter la colonne marque_id
+    cr.execute("ALTER TABLE location_vehicule ADD COLUMN IF NOT EXISTS marque_id INTEGER")
+    cr.commit()
+    
+    # Mettre à jour les références, par lots
+    batched_update(
+        cr, 'location_vehicule', "marque_id = m.id",
+        name='location_vehicule_marque_id',
+        from_sql='location_marque m',
+        where='t.marque_temp = m.name AND t.marque_id IS NULL',
+    )
+    
+    # Supprimer la colonne temporaire
+    cr.execute("ALTER TABLE location_vehicule DROP COLUMN marque_temp")
@@ -0,0 +1,50 @@
+import logging
+from datetime import date
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Rendre les contrats compatibles avec l'exclusion GiST des périodes
+
+    La contrainte vehicule_periode_exclusive ne peut pas être créée tant
+    que des contrats confirmés ou en cours se chevauchent sur un même
+    véhicule (l'ancienne vérification Python ne détectait pas un contrat
+    englobant un autre) ; Odoo se contenterait alors d'un avertissement.
+    Corrigé ici, avant le chargement du modèle :
+    - date de fin antérieure au début : ramenée à la date de début ;
+    - chevauchement : le contrat qui commence le plus tard est annulé.
+    """
+    cr.execute("""
+        UPDATE location_location
+           SET date_fin = date_debut
+         WHERE date_fin < date_debut
+     RETURNING name
+    """)
+    corriges = [row[0] for row in cr.fetchall()]
+    if corriges:
+        _logger.warning("Contrats dont la date de fin précédait le début (corrigée) : %s", corriges)
+
+    cr.execute("""
+        SELECT id, name, vehicule_id, date_debut, date_fin
+          FROM location_location
+         WHERE statut IN ('confirmee', 'en_cours')
+      ORDER BY vehicule_id, date_debut, id
+    """)
+    a_annuler, noms = [], []
+    fin_max = {}
+    for location_id, name, vehicule_id, debut, fin in cr.fetchall():
+        fin = fin or date.max
+        # Triés par début : chevauche un contrat conservé <=> début <= fin max conservée
+        if vehicule_id in fin_max and debut <= fin_max[vehicule_id]:
+            a_annuler.append(location_id)
+            noms.append(name)
+        else:
+            fin_max[vehicule_id] = fin
+
+    if a_annuler:
+        cr.execute("UPDATE location_location SET statut = 'annulee' WHERE id = ANY(%s)", [a_annuler])
+        _logger.warning(
+            "%s contrat(s) chevauchant un contrat antérieur du même véhicule annulé(s) : %s",
+            len(a_annuler), ', '.join(noms),
+        )
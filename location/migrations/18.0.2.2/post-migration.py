@@ -0,0 +1,12 @@
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    """Reconstruire une fois les statistiques de la flotte
+
+    Les contrats n'appliquent plus que leurs propres variations : la
+    reconstruction complète, autrefois relancée à chaque mise à jour du
+    module, est faite ici puis chaque nuit par la tâche planifiée.
+    """
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['location.vehicule']._cron_refresh_statistiques()
@@ -1 +1,5 @@
-from . import location
\ No newline at end of file
+from . import location
+from . import reservation
+from . import facturation
+from . import impression
+from . import telemetrie
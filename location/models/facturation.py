@@ -0,0 +1,52 @@
+from odoo import models, fields, api
+from odoo.exceptions import ValidationError
+
+
+class FacturationLocation(models.TransientModel):
+    _name = 'location.facturation'
+    _description = 'Facturation groupée des locations'
+
+    def _default_location_ids(self):
+        if self.env.context.get('active_model') != 'location.location':
+            return False
+        return self.env['location.location'].browse(self.env.context.get('active_ids', [])).filtered(
+            lambda l: l.statut == 'terminee' and not l.invoice_id
+        )
+
+    location_ids = fields.Many2many(
+        'location.location',
+        string='Contrats à facturer',
+        default=_default_location_ids,
+        domain="[('statut', '=', 'terminee'), ('invoice_id', '=', False)]"
+    )
+    invoice_date = fields.Date('Date de facture', required=True, default=fields.Date.today)
+    valider = fields.Boolean('Valider les factures', default=True,
+                             help="Comptabiliser les factures dès leur création")
+    nombre_clients = fields.Integer('Factures à créer', compute='_compute_nombre_clients')
+
+    @api.depends('location_ids')
+    def _compute_nombre_clients(self):
+        for record in self:
+            record.nombre_clients = len(record.location_ids.client_id)
+
+    def action_facturer(self):
+        """Une facture par client pour les contrats terminés sélectionnés"""
+        self.ensure_one()
+        locations = self.location_ids
+        if not locations:
+            raise ValidationError("Aucun contrat terminé et non facturé sélectionné.")
+        if locations.filtered(lambda l: l.statut != 'terminee'):
+            raise ValidationError("Seuls les contrats terminés peuvent être facturés.")
+
+        invoices = locations._create_invoices(self.invoice_date)
+        if self.valider:
+            invoices.action_post()
+
+        return {
+            'type': 'ir.actions.act_window',
+            'name': 'Factures',
+            'res_model': 'account.move',
+            'view_mode': 'list,form',
+            'domain': [('id', 'in', invoices.ids)],
+            'context': {'default_move_type': 'out_invoice'},
+        }
@@ -0,0 +1,125 @@
+import base64
+import io
+import zipfile
+
+from odoo import models, fields, api
+from odoo.exceptions import ValidationError
+
+RAPPORT_CONTRAT = 'location.report_location_contract'
+
+
+class ImpressionContrats(models.Model):
+    """Impression en lot des contrats, traitée en tâche de fond
+
+    Les contrats sans PDF à jour sont rendus en un seul appel wkhtmltopdf ;
+    chaque PDF est conservé en pièce jointe dont le nom contient la date de
+    modification du contrat (voir l'action report_location_contract), si
+    bien qu'un contrat inchangé n'est jamais rendu deux fois.
+    """
+    _name = 'location.impression'
+    _description = 'Impression en lot des contrats de location'
+    _order = 'create_date desc, id desc'
+
+    def _default_location_ids(self):
+        if self.env.context.get('active_model') != 'location.location':
+            return False
+        return self.env.context.get('active_ids')
+
+    name = fields.Char('Référence', required=True, readonly=True, default='Nouvelle impression')
+    location_ids = fields.Many2many('location.location', string='Contrats', required=True,
+                                    default=_default_location_ids)
+    mode = fields.Selection([
+        ('fusion', 'Un seul PDF'),
+        ('zip', 'Archive ZIP (un PDF par contrat)'),
+    ], string='Format', default='fusion', required=True)
+    state = fields.Selection([
+        ('brouillon', 'Brouillon'),
+        ('attente', 'En attente'),
+        ('termine', 'Terminé'),
+        ('erreur', 'Erreur'),
+    ], string='État', default='brouillon', required=True, readonly=True)
+    nombre_contrats = fields.Integer('Contrats', compute='_compute_nombre_contrats')
+    nombre_rendus = fields.Integer('PDF générés', readonly=True,
+                                   help="Contrats rendus par wkhtmltopdf (les autres venaient du cache)")
+    fichier = fields.Binary('Fichier', attachment=True, readonly=True)
+    nom_fichier = fields.Char('Nom du fichier', readonly=True)
+    message = fields.Text('Erreur', readonly=True)
+
+    @api.depends('location_ids')
+    def _compute_nombre_contrats(self):
+        for record in self:
+            record.nombre_contrats = len(record.location_ids)
+
+    def action_lancer(self):
+        """Met l'impression en file d'attente et réveille la tâche planifiée"""
+        for record in self:
+            if not record.location_ids:
+                raise ValidationError("Sélectionnez au moins un contrat à imprimer.")
+        self.write({
+            'state': 'attente',
+            'name': f"Contrats du {fields.Date.context_today(self).strftime('%d/%m/%Y')}",
+            'message': False,
+        })
+        self.env.ref('location.ir_cron_location_impressions')._trigger()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': 'Impressions en lot',
+            'res_model': self._name,
+            'view_mode': 'list,form',
+        }
+
+    def _get_pieces_jointes(self, locations):
+        return self.env['ir.attachment'].search([
+            ('res_model', '=', 'location.location'),
+            ('res_id', 'in', locations.ids),
+            ('name', '=like', 'Contrat\\_%'),
+        ])
+
+    def _traiter(self):
+        """Rend les contrats de l'impression et produit le fichier final"""
+        self.ensure_one()
+        locations = self.location_ids.sorted(lambda l: (l.date_debut, l.id))
+        noms = {location.id: location._nom_pdf_contrat() for location in locations}
+        en_cache = {(a.res_id, a.name) for a in self._get_pieces_jointes(locations)}
+        a_rendre = locations.filtered(lambda l: (l.id, noms[l.id]) not in en_cache)
+
+        # Un seul appel wkhtmltopdf pour tous les contrats sans PDF à jour ;
+        # le rapport enregistre lui-même les nouveaux PDF en pièces jointes
+        contenu, _format = self.env['ir.actions.report']._render_qweb_pdf(RAPPORT_CONTRAT, res_ids=locations.ids)
+
+        # Versions précédentes des contrats modifiés depuis leur dernier rendu
+        pieces_jointes = self._get_pieces_jointes(locations)
+        courantes = pieces_jointes.filtered(lambda a: a.name == noms[a.res_id])
+        (pieces_jointes - courantes).unlink()
+
+        if self.mode == 'fusion':
+            nom_fichier = f'{self.name}.pdf'
+        else:
+            pieces = {a.res_id: a.raw for a in courantes}
+            buffer = io.BytesIO()
+            with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+                for location in locations:
+                    archive.writestr(f"{location.name.replace('/', '_')}.pdf", pieces[location.id])
+            contenu = buffer.getvalue()
+            nom_fichier = f'{self.name}.zip'
+
+        self.write({
+            'state': 'termine',
+            'fichier': base64.b64encode(contenu),
+            'nom_fichier': nom_fichier.replace('/', '-'),
+            'nombre_rendus': len(a_rendre),
+        })
+
+    @api.model
+    def _cron_traiter_impressions(self):
+        """Traite une impression en attente, puis se relance s'il en reste"""
+        impression = self.search([('state', '=', 'attente')], order='create_date, id', limit=1)
+        if not impression:
+            return
+        try:
+            with self.env.cr.savepoint():
+                impression._traiter()
+        except Exception as e:
+            impression.write({'state': 'erreur', 'message': str(e)})
+        if self.search_count([('state', '=', 'attente')], limit=1):
+            self.env.ref('location.ir_cron_location_impressions')._trigger()
@@ -1,6 +1,57 @@
 from odoo import models, fields, api
 from odoo.exceptions import ValidationError
-from datetime import date
+from odoo.tools import split_every
+from collections import defaultdict
+from datetime import date, timedelta
+from dateutil.relativedelta import relativedelta
+import hashlib
+
+# Statuts comptés dans les statistiques : contrats signés, et ceux dont le
+# véhicule est (ou a été) effectivement loué
+STATUTS_COMPTES = ('confirmee', 'en_cours', 'terminee')
+STATUTS_LOUES = ('en_cours', 'terminee')
+# Véhicules recalculés par requête lors du rafraîchissement nocturne
+STATISTIQUES_LOT = 1000
+
+# Paliers de tarification (en jours)
+JOURS_PAR_SEMAINE = 7
+JOURS_PAR_MOIS = 30
+
+
+def tarif_optimal(nb_jours, prix_journalier, prix_hebdomadaire=0.0, prix_mensuel=0.0):
+    """Combinaison mois / semaines / jours la moins chère couvrant nb_jours
+
+    Un palier sans prix (0) n'est pas proposé. Un palier peut dépasser la
+    durée restante s'il coûte moins cher (ex. 6 jours facturés 1 semaine).
+
+    :return: tuple (montant, mois, semaines, jours)
+    """
+    meilleur = (nb_jours * prix_journalier, 0, 0, nb_jours)
+    max_mois = -(-nb_jours // JOURS_PAR_MOIS) if prix_mensuel else 0
+    for mois in range(max_mois + 1):
+        reste = max(nb_jours - mois * JOURS_PAR_MOIS, 0)
+        # Coût linéaire en semaines jusqu'à reste // 7 : seuls les bornes comptent
+        semaines_possibles = {0}
+        if prix_hebdomadaire:
+            semaines_possibles |= {reste // JOURS_PAR_SEMAINE, -(-reste // JOURS_PAR_SEMAINE)}
+        for semaines in semaines_possibles:
+            jours = max(reste - semaines * JOURS_PAR_SEMAINE, 0)
+            montant = mois * prix_mensuel + semaines * prix_hebdomadaire + jours * prix_journalier
+            if montant < meilleur[0]:
+                meilleur = (montant, mois, semaines, jours)
+    return meilleur
+
+
+def libelle_tarif(mois, semaines, jours):
+    """Ex. : '1 mois + 2 semaines + 3 jours'"""
+    parties = []
+    if mois:
+        parties.append(f"{mois} mois")
+    if semaines:
+        parties.append(f"{semaines} semaine{'s' if semaines > 1 else ''}")
+    if jours:
+        parties.append(f"{jours} jour{'s' if jours > 1 else ''}")
+    return ' + '.join(parties)
 
 class MarqueVehicule(models.Model):
     _name = 'location.marque'
@@ -17,6 +68,27 @@ class MarqueVehicule(models.Model):
         ('code_unique', 'UNIQUE(code)', 'Ce code existe déjà !'),
     ]
 
+class SaisonTarifaire(models.Model):
+    _name = 'location.saison'
+    _description = 'Saison tarifaire'
+    _order = 'date_debut desc'
+
+    name = fields.Char('Nom', required=True)
+    date_debut = fields.Date('Date de début', required=True)
+    date_fin = fields.Date('Date de fin', required=True)
+    coefficient = fields.Float('Coefficient (%)', default=100.0, required=True,
+                               help="Appliqué au tarif des jours de la saison (ex. 120 = +20 %)")
+    vehicule_ids = fields.Many2many('location.vehicule', string='Véhicules',
+                                    help="Laisser vide pour appliquer la saison à toute la flotte")
+    actif = fields.Boolean('Actif', default=True)
+
+    _sql_constraints = [
+        ('check_dates', 'CHECK(date_fin >= date_debut)',
+         'La date de fin doit être postérieure à la date de début !'),
+        ('check_coefficient', 'CHECK(coefficient > 0)',
+         'Le coefficient doit être positif !'),
+    ]
+
 class Vehicule(models.Model):
     _name = 'location.vehicule'
     _description = 'Véhicule disponible à la location'
@@ -32,6 +104,11 @@ class Vehicule(models.Model):
     # Images
     image_1920 = fields.Image("Image", max_width=1920, max_height=1920)
     image_128 = fields.Image("Image 128", related="image_1920", max_width=128, max_height=128, store=True)
+    image_256 = fields.Image("Image 256", related="image_1920", max_width=256, max_height=256, store=True)
+    # Empreinte du contenu : URL stables, mises en cache par le navigateur
+    image_hash = fields.Char('Empreinte image', compute='_compute_image_hash', store=True)
+    image_128_url = fields.Char('URL image 128', compute='_compute_image_urls')
+    image_256_url = fields.Char('URL image 256', compute='_compute_image_urls')
     
     # Caractéristiques techniques
     annee = fields.Integer('Année', tracking=True)
@@ -55,8 +132,8 @@ class Vehicule(models.Model):
     # Documents
     date_mise_circulation = fields.Date('Date de mise en circulation', tracking=True)
     date_derniere_revision = fields.Date('Dernière révision', tracking=True)
-    date_prochaine_revision = fields.Date('Prochaine révision', tracking=True)
-    date_expiration_assurance = fields.Date('Expiration assurance', tracking=True)
+    date_prochaine_revision = fields.Date('Prochaine révision', tracking=True, index=True)
+    date_expiration_assurance = fields.Date('Expiration assurance', tracking=True, index=True)
     numero_police_assurance = fields.Char('N° police d\'assurance', tracking=True)
     
     statut = fields.Selection([
@@ -68,9 +145,12 @@ class Vehicule(models.Model):
 
     location_ids = fields.One2many('location.location', 'vehicule_id', string='Historique des locations')
     
-    # Champs calculés
-    total_locations = fields.Integer('Total locations', compute='_compute_total_locations')
-    revenu_total = fields.Float('Revenu total généré', compute='_compute_revenu_total')
+    # Statistiques maintenues par les contrats (voir Location._deltas_statistiques)
+    total_locations = fields.Integer('Total locations', readonly=True, copy=False, default=0)
+    revenu_total = fields.Float('Revenu total généré', readonly=True, copy=False, default=0.0)
+    jours_loues = fields.Integer('Jours loués', readonly=True, copy=False, default=0)
+    taux_utilisation = fields.Float('Taux d\'utilisation (%)', readonly=True, copy=False, default=0.0,
+                                    help="Jours loués sur les 365 derniers jours")
     
     _sql_constraints = [
         ('immatriculation_unique', 'UNIQUE(immatriculation)', 
@@ -79,19 +159,222 @@ class Vehicule(models.Model):
          'L\'année doit être valide !'),
     ]
 
-    @api.depends('location_ids')
-    def _compute_total_locations(self):
+    @api.depends('image_1920')
+    def _compute_image_hash(self):
         for record in self:
-            record.total_locations = len(record.location_ids)
-    
-    @api.depends('location_ids.montant_total', 'location_ids.statut')
-    def _compute_revenu_total(self):
+            record.image_hash = hashlib.sha1(record.image_1920).hexdigest() if record.image_1920 else False
+
+    @api.depends('image_hash')
+    def _compute_image_urls(self):
+        """URL /web/image avec l'empreinte en paramètre unique : réponse
+        immuable, mise en cache un an, aucune donnée base64 via JSON-RPC"""
         for record in self:
-            locations_terminees = record.location_ids.filtered(
-                lambda l: l.statut == 'terminee'
+            for taille in (128, 256):
+                record[f'image_{taille}_url'] = (
+                    f'/web/image/location.vehicule/{record.id}/image_{taille}?unique={record.image_hash}'
+                    if record.image_hash and record.id else False
+                )
+
+    def _refresh_statistiques(self):
+        """Recalcule entièrement les statistiques des véhicules (SQL ensembliste)
+
+        - total_locations : contrats confirmés, en cours ou terminés
+        - revenu_total : montant des contrats terminés
+        - jours_loues / taux_utilisation : contrats en cours ou terminés
+        Reconstruit aussi la table de faits mensuelle de ces véhicules.
+        Réservé à la tâche nocturne et aux migrations : les contrats
+        appliquent leurs variations (voir _appliquer_deltas_statistiques).
+        """
+        if not self:
+            return
+        self.env['location.location'].flush_model(
+            ['vehicule_id', 'statut', 'date_debut', 'date_fin', 'montant_total']
+        )
+        aujourdhui = fields.Date.context_today(self)
+        self.env.cr.execute("""
+            WITH stats AS (
+                SELECT v.id,
+                       COUNT(l.id) FILTER (WHERE l.statut IN ('confirmee', 'en_cours', 'terminee')) AS nombre,
+                       COALESCE(SUM(l.montant_total) FILTER (WHERE l.statut = 'terminee'), 0) AS revenu,
+                       COALESCE(SUM(l.date_fin - l.date_debut + 1)
+                                FILTER (WHERE l.statut IN ('en_cours', 'terminee')), 0) AS jours,
+                       COALESCE(SUM(GREATEST(LEAST(l.date_fin, %(aujourdhui)s)
+                                             - GREATEST(l.date_debut, %(aujourdhui)s - 364) + 1, 0))
+                                FILTER (WHERE l.statut IN ('en_cours', 'terminee')), 0) AS jours_annee
+                  FROM location_vehicule v
+             LEFT JOIN location_location l ON l.vehicule_id = v.id
+                 WHERE v.id = ANY(%(ids)s)
+              GROUP BY v.id
             )
-            record.revenu_total = sum(locations_terminees.mapped('montant_total'))
-    
+            UPDATE location_vehicule v
+               SET total_locations = stats.nombre,
+                   revenu_total = stats.revenu,
+                   jours_loues = stats.jours,
+                   taux_utilisation = ROUND(stats.jours_annee * 100.0 / 365, 2)
+              FROM stats
+             WHERE stats.id = v.id
+        """, {'ids': self.ids, 'aujourdhui': aujourdhui})
+        self.invalidate_recordset(['total_locations', 'revenu_total', 'jours_loues', 'taux_utilisation'])
+        self.env['location.statistique.mensuelle']._refresh(self)
+
+    @api.model
+    def _cron_refresh_statistiques(self):
+        """Rafraîchissement nocturne : fenêtre glissante du taux d'utilisation,
+        montants recalculés hors contrat (tarif du véhicule) et dérives
+        d'arrondi des variations"""
+        for vehicules in split_every(STATISTIQUES_LOT, self.search([]).ids, self.browse):
+            vehicules._refresh_statistiques()
+
+    @api.model
+    def _appliquer_deltas_statistiques(self, deltas):
+        """Applique les variations calculées par Location._deltas_statistiques
+
+        Une requête pour les véhicules, deux pour les lignes mensuelles, quel
+        que soit le nombre de contrats modifiés.
+        """
+        vehicules = {vid: d for vid, d in deltas['vehicules'].items() if any(d)}
+        if vehicules:
+            self.flush_model(['total_locations', 'revenu_total', 'jours_loues', 'taux_utilisation'])
+            self.env.cr.execute("""
+                UPDATE location_vehicule v
+                   SET total_locations = v.total_locations + d.nombre,
+                       revenu_total = v.revenu_total + d.revenu,
+                       jours_loues = v.jours_loues + d.jours,
+                       taux_utilisation = ROUND((v.taux_utilisation + d.jours_annee * 100.0 / 365)::numeric, 2)
+                  FROM UNNEST(%s::int[], %s::int[], %s::float8[], %s::int[], %s::int[])
+                       AS d(id, nombre, revenu, jours, jours_annee)
+                 WHERE v.id = d.id
+            """, [list(vehicules), *(list(colonne) for colonne in zip(*vehicules.values()))])
+            self.browse(vehicules).invalidate_recordset(
+                ['total_locations', 'revenu_total', 'jours_loues', 'taux_utilisation'])
+        self.env['location.statistique.mensuelle']._appliquer_deltas(deltas['mois'])
+    
+    # Échéances surveillées : champ date -> type d'activité créé
+    _ECHEANCES = {
+        'date_expiration_assurance': 'location.mail_activity_type_assurance',
+        'date_prochaine_revision': 'location.mail_activity_type_revision',
+    }
+
+    @api.model
+    def _get_echeances(self, date_limite):
+        """Véhicules dont l'assurance expire ou la révision tombe avant date_limite
+
+        Une requête (index des deux dates combinés en BitmapOr).
+
+        :return: liste de tuples (vehicule_id, champ date, échéance)
+        """
+        self.flush_model(['statut', *self._ECHEANCES])
+        self.env.cr.execute("""
+            SELECT id, date_expiration_assurance, date_prochaine_revision
+              FROM location_vehicule
+             WHERE statut != 'hors_service'
+               AND (date_expiration_assurance <= %(limite)s
+                    OR date_prochaine_revision <= %(limite)s)
+        """, {'limite': date_limite})
+        return [
+            (vehicule_id, champ, echeance)
+            for vehicule_id, *dates in self.env.cr.fetchall()
+            for champ, echeance in zip(self._ECHEANCES, dates)
+            if echeance and echeance <= date_limite
+        ]
+
+    @api.model
+    def _cron_alertes_echeances(self):
+        """Planifie une activité par véhicule et par échéance proche (sans doublon)
+
+        Délai d'alerte : paramètre système location.alerte_echeance_jours (15).
+        :return: nombre d'activités créées
+        """
+        delai = int(self.env['ir.config_parameter'].sudo().get_param('location.alerte_echeance_jours', 15))
+        aujourdhui = fields.Date.context_today(self)
+        echeances = self._get_echeances(aujourdhui + timedelta(days=delai))
+        if not echeances:
+            return 0
+
+        types = {champ: self.env.ref(xmlid) for champ, xmlid in self._ECHEANCES.items()}
+        # Activités déjà ouvertes : une requête pour tous les véhicules
+        Activity = self.env['mail.activity']
+        existantes = set(Activity._read_group(
+            [('res_model', '=', self._name),
+             ('res_id', 'in', [vehicule_id for vehicule_id, _champ, _echeance in echeances]),
+             ('activity_type_id', 'in', [t.id for t in types.values()])],
+            groupby=['res_id', 'activity_type_id'],
+        ))
+        responsable = self.env.ref('location.group_location_manager').users[:1] or self.env.user
+        vehicules = self.browse(vehicule_id for vehicule_id, _champ, _echeance in echeances)
+        vehicules.fetch(['name', 'immatriculation'])
+        res_model_id = self.env['ir.model']._get_id(self._name)
+
+        vals_list = []
+        for vehicule, (_vehicule_id, champ, echeance) in zip(vehicules, echeances):
+            activity_type = types[champ]
+            if (vehicule.id, activity_type) in existantes:
+                continue
+            vals_list.append({
+                'res_model_id': res_model_id,
+                'res_id': vehicule.id,
+                'activity_type_id': activity_type.id,
+                'summary': f"{activity_type.name} : {vehicule.name} ({vehicule.immatriculation}) "
+                           f"le {echeance.strftime('%d/%m/%Y')}",
+                'date_deadline': max(echeance, aujourdhui),
+                'user_id': (activity_type.default_user_id or responsable).id,
+            })
+        Activity.create(vals_list)
+        return len(vals_list)
+
+    # Filtres acceptés par search_available : nom -> condition SQL
+    _AVAILABILITY_FILTERS = {
+        'nombre_places_min': 'v.nombre_places >= %s',
+        'type_carburant': 'v.type_carburant = %s',
+        'marque_id': 'v.marque_id = %s',
+        'prix_journalier_max': 'v.prix_journalier <= %s',
+    }
+
+    @api.model
+    def search_available(self, date_debut, date_fin, **filters):
+        """Véhicules libres sur toute la période [date_debut, date_fin]
+
+        Une seule requête : anti-jointure sur les contrats confirmés ou en
+        cours qui chevauchent la période (index GiST de la contrainte
+        d'exclusion location_location_vehicule_periode_exclusive).
+        Exclut aussi les véhicules dont l'assurance expire ou la révision
+        tombe avant la fin de la période.
+
+        :param filters: nombre_places_min, type_carburant, marque_id,
+                        prix_journalier_max (les valeurs vides sont ignorées)
+        :return: recordset location.vehicule trié par prix journalier
+        """
+        self.check_access('read')
+        self.env['location.location'].flush_model(['vehicule_id', 'statut', 'date_debut', 'date_fin'])
+        self.flush_model()
+
+        conditions, params = [], {'date_debut': date_debut, 'date_fin': date_fin}
+        for name, value in filters.items():
+            if name not in self._AVAILABILITY_FILTERS:
+                raise ValueError(f"Filtre de disponibilité inconnu : {name}")
+            if value:
+                conditions.append(self._AVAILABILITY_FILTERS[name] % f'%({name})s')
+                params[name] = value
+
+        self.env.cr.execute(f"""
+            SELECT v.id
+              FROM location_vehicule v
+             WHERE v.statut NOT IN ('maintenance', 'hors_service')
+               AND (v.date_expiration_assurance IS NULL OR v.date_expiration_assurance >= %(date_fin)s)
+               AND (v.date_prochaine_revision IS NULL OR v.date_prochaine_revision > %(date_fin)s)
+               {''.join(f'AND {condition} ' for condition in conditions)}
+               AND NOT EXISTS (
+                       SELECT 1
+                         FROM location_location l
+                        WHERE l.vehicule_id = v.id
+                          AND l.statut IN ('confirmee', 'en_cours')
+                          AND daterange(l.date_debut, l.date_fin, '[]')
+                              && daterange(%(date_debut)s, %(date_fin)s, '[]')
+                   )
+          ORDER BY v.prix_journalier, v.id
+        """, params)
+        return self.browse(row[0] for row in self.env.cr.fetchall())
+
     def action_view_locations(self):
         """Affiche toutes les locations de ce véhicule"""
         self.ensure_one()
@@ -153,6 +436,7 @@ class Location(models.Model):
     prix_journalier = fields.Float(related='vehicule_id.prix_journalier', 
                                    string='Prix journalier', readonly=True)
     montant_location = fields.Float('Montant location', compute='_compute_montant', store=True)
+    detail_tarif = fields.Char('Détail du tarif', compute='_compute_detail_tarif')
     montant_caution = fields.Float(related='vehicule_id.caution', 
                                    string='Caution', readonly=True)
     frais_supplementaires = fields.Float('Frais supplémentaires', tracking=True)
@@ -202,12 +486,91 @@ class Location(models.Model):
     gps_inclus = fields.Boolean('GPS inclus', tracking=True)
     siege_bebe = fields.Boolean('Siège bébé', tracking=True)
     
+    # Disponibilité garantie par PostgreSQL : deux contrats actifs d'un même
+    # véhicule ne peuvent pas se chevaucher (vérification atomique et indexée)
+    _sql_constraints = [
+        ('check_dates', 'CHECK(date_fin >= date_debut)',
+         'La date de fin doit être postérieure à la date de début !'),
+        ('vehicule_periode_exclusive',
+         "EXCLUDE USING gist (vehicule_id WITH =, daterange(date_debut, date_fin, '[]') WITH &&) "
+         "WHERE (statut IN ('confirmee', 'en_cours'))",
+         'Ce véhicule est déjà loué sur cette période !'),
+    ]
+
+    def _auto_init(self):
+        # btree_gist : requis pour vehicule_id WITH = dans un index GiST
+        self.env.cr.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+        return super()._auto_init()
+
+    # Champs dont dépendent les statistiques des véhicules
+    _STATISTIQUES_FIELDS = {'vehicule_id', 'statut', 'date_debut', 'date_fin',
+                            'frais_supplementaires', 'reduction'}
+
     @api.model_create_multi
     def create(self, vals_list):
         for vals in vals_list:
             if vals.get('name', 'Nouveau') == 'Nouveau':
                 vals['name'] = self.env['ir.sequence'].next_by_code('location.location') or 'Nouveau'
-        return super(Location, self).create(vals_list)
+        records = super(Location, self).create(vals_list)
+        self.env['location.vehicule']._appliquer_deltas_statistiques(records._deltas_statistiques(1))
+        return records
+
+    def write(self, vals):
+        if not self._STATISTIQUES_FIELDS & vals.keys():
+            return super().write(vals)
+        # Contribution retirée avec les anciennes valeurs, ajoutée avec les nouvelles
+        deltas = self._deltas_statistiques(-1)
+        res = super().write(vals)
+        self._deltas_statistiques(1, deltas)
+        self.env['location.vehicule']._appliquer_deltas_statistiques(deltas)
+        return res
+
+    def unlink(self):
+        deltas = self._deltas_statistiques(-1)
+        res = super().unlink()
+        self.env['location.vehicule']._appliquer_deltas_statistiques(deltas)
+        return res
+
+    def _deltas_statistiques(self, signe, deltas=None):
+        """Contribution des contrats aux statistiques de leurs véhicules
+
+        :param signe: 1 pour ajouter la contribution, -1 pour la retirer
+        :param deltas: variations à compléter (nouveau dict si None)
+        :return: dict {'vehicules': {id: [nombre, revenu, jours, jours_annee]},
+                       'mois': {(id, mois): [nombre, jours, revenu]}}
+        """
+        if deltas is None:
+            deltas = {
+                'vehicules': defaultdict(lambda: [0, 0.0, 0, 0]),
+                'mois': defaultdict(lambda: [0, 0, 0.0]),
+            }
+        aujourdhui = fields.Date.context_today(self)
+        debut_annee = aujourdhui - timedelta(days=364)
+        for record in self:
+            if record.statut not in STATUTS_COMPTES:
+                continue
+            vehicule = deltas['vehicules'][record.vehicule_id.id]
+            vehicule[0] += signe
+            if record.statut not in STATUTS_LOUES:
+                continue
+            jours = (record.date_fin - record.date_debut).days + 1
+            revenu = record.montant_total if record.statut == 'terminee' else 0.0
+            vehicule[1] += signe * revenu
+            vehicule[2] += signe * jours
+            vehicule[3] += signe * max((min(record.date_fin, aujourdhui) - max(record.date_debut, debut_annee)).days + 1, 0)
+
+            # Répartition par mois calendaire, revenu au prorata des jours
+            jour = record.date_debut
+            while jour <= record.date_fin:
+                mois = jour.replace(day=1)
+                fin = min(mois + relativedelta(months=1, days=-1), record.date_fin)
+                jours_mois = (fin - jour).days + 1
+                ligne = deltas['mois'][(record.vehicule_id.id, mois)]
+                ligne[0] += signe if jour == record.date_debut else 0
+                ligne[1] += signe * jours_mois
+                ligne[2] += signe * revenu * jours_mois / jours
+                jour = fin + timedelta(days=1)
+        return deltas
     
     @api.depends('date_debut', 'date_fin')
     def _compute_duree(self):
@@ -225,14 +588,60 @@ class Location(models.Model):
             else:
                 record.kilometrage_parcouru = 0.0
 
-    @api.depends('date_debut', 'date_fin', 'vehicule_id.prix_journalier', 
+    def _get_coefficients_saison(self):
+        """Coefficient saisonnier moyen par contrat (1.0 hors saison)
+
+        Les saisons du recordset entier sont lues en une seule requête.
+        Si plusieurs saisons couvrent un même jour, la plus forte s'applique.
+
+        :return: dict {contrat: coefficient}
+        """
+        contrats = self.filtered(lambda l: l.date_debut and l.date_fin and l.vehicule_id)
+        if not contrats:
+            return {}
+        saisons = self.env['location.saison'].search([
+            ('actif', '=', True),
+            ('date_debut', '<=', max(contrats.mapped('date_fin'))),
+            ('date_fin', '>=', min(contrats.mapped('date_debut'))),
+        ])
+        coefficients = {}
+        for record in contrats:
+            applicables = saisons.filtered(
+                lambda s: s.date_debut <= record.date_fin and s.date_fin >= record.date_debut
+                and (not s.vehicule_ids or record.vehicule_id in s.vehicule_ids)
+            )
+            if not applicables:
+                continue
+            nb_jours = (record.date_fin - record.date_debut).days + 1
+            total = 0.0
+            for i in range(nb_jours):
+                jour = record.date_debut + timedelta(days=i)
+                total += max(
+                    (s.coefficient for s in applicables if s.date_debut <= jour <= s.date_fin),
+                    default=100.0,
+                )
+            coefficients[record] = total / nb_jours / 100.0
+        return coefficients
+
+    @api.depends('date_debut', 'date_fin', 'vehicule_id.prix_journalier',
+                 'vehicule_id.prix_hebdomadaire', 'vehicule_id.prix_mensuel',
                  'frais_supplementaires', 'reduction')
     def _compute_montant(self):
-        """Calcule automatiquement le montant total de la location"""
+        """Calcule le montant de tous les contrats du recordset en une passe
+
+        Tarif le moins cher entre mois, semaines et jours (tarif_optimal),
+        mémorisé par durée et grille de prix, puis coefficient saisonnier.
+        """
+        coefficients = self._get_coefficients_saison()
+        tarifs = {}
         for record in self:
             if record.date_debut and record.date_fin and record.vehicule_id:
-                nb_jours = (record.date_fin - record.date_debut).days + 1
-                montant_base = nb_jours * record.vehicule_id.prix_journalier
+                vehicule = record.vehicule_id
+                cle = ((record.date_fin - record.date_debut).days + 1, vehicule.prix_journalier,
+                       vehicule.prix_hebdomadaire, vehicule.prix_mensuel)
+                if cle not in tarifs:
+                    tarifs[cle] = tarif_optimal(*cle)
+                montant_base = tarifs[cle][0] * coefficients.get(record, 1.0)
                 record.montant_location = montant_base
                 
                 # Application de la réduction
@@ -242,6 +651,20 @@ class Location(models.Model):
             else:
                 record.montant_location = 0.0
                 record.montant_total = 0.0
+
+    @api.depends('date_debut', 'date_fin', 'vehicule_id.prix_journalier',
+                 'vehicule_id.prix_hebdomadaire', 'vehicule_id.prix_mensuel')
+    def _compute_detail_tarif(self):
+        for record in self:
+            if record.date_debut and record.date_fin and record.vehicule_id:
+                vehicule = record.vehicule_id
+                _montant, mois, semaines, jours = tarif_optimal(
+                    (record.date_fin - record.date_debut).days + 1, vehicule.prix_journalier,
+                    vehicule.prix_hebdomadaire, vehicule.prix_mensuel,
+                )
+                record.detail_tarif = libelle_tarif(mois, semaines, jours)
+            else:
+                record.detail_tarif = False
     
     @api.depends('invoice_id')
     def _compute_invoice_count(self):
@@ -264,30 +687,20 @@ class Location(models.Model):
             if record.reduction < 0 or record.reduction > 100:
                 raise ValidationError("La réduction doit être entre 0 et 100%")
     
-    @api.constrains('vehicule_id', 'date_debut', 'date_fin')
-    def _check_disponibilite(self):
-        """Vérifie qu'un véhicule n'est pas déjà loué sur la période"""
-        for record in self:
-            if record.vehicule_id and record.date_debut and record.date_fin:
-                chevauchement = self.search([
-                    ('vehicule_id', '=', record.vehicule_id.id),
-                    ('id', '!=', record.id),
-                    ('statut', 'in', ['confirmee', 'en_cours']),
-                    '|',
-                    '&', ('date_debut', '<=', record.date_debut), 
-                         ('date_fin', '>=', record.date_debut),
-                    '&', ('date_debut', '<=', record.date_fin), 
-                         ('date_fin', '>=', record.date_fin),
-                ])
-                if chevauchement:
-                    raise ValidationError(
-                        f"Le véhicule {record.vehicule_id.name} est déjà loué du "
-                        f"{chevauchement[0].date_debut} au {chevauchement[0].date_fin} !"
-                    )
-    
     def action_confirmer(self):
         """Confirme la location et rend le véhicule indisponible"""
         for record in self:
+            vehicule = record.vehicule_id
+            if vehicule.date_expiration_assurance and vehicule.date_expiration_assurance < record.date_fin:
+                raise ValidationError(
+                    f"L'assurance du véhicule {vehicule.name} expire le "
+                    f"{vehicule.date_expiration_assurance.strftime('%d/%m/%Y')}, avant la fin de la location."
+                )
+            if vehicule.date_prochaine_revision and vehicule.date_prochaine_revision <= record.date_fin:
+                raise ValidationError(
+                    f"La révision du véhicule {vehicule.name} est prévue le "
+                    f"{vehicule.date_prochaine_revision.strftime('%d/%m/%Y')}, avant la fin de la location."
+                )
             record.statut = 'confirmee'
             record.vehicule_id.statut = 'loue'
             record.message_post(body="Location confirmée")
@@ -314,39 +727,60 @@ class Location(models.Model):
                 record.vehicule_id.statut = 'disponible'
             record.message_post(body="Location annulée")
     
-    def action_create_invoice(self):
-        """Crée une facture pour la location"""
+    def _prepare_invoice_lines(self):
+        """Lignes de facture du contrat : location (réduction en remise) et frais"""
         self.ensure_one()
-        
-        if self.invoice_id:
-            raise ValidationError("Une facture existe déjà pour cette location")
-        
-        # Création de la facture
-        invoice_vals = {
-            'move_type': 'out_invoice',
-            'partner_id': self.client_id.id,
-            'invoice_date': fields.Date.today(),
-            'invoice_line_ids': [
-                (0, 0, {
-                    'name': f'Location {self.vehicule_id.name} du {self.date_debut} au {self.date_fin}',
-                    'quantity': self.duree_jours,
-                    'price_unit': self.prix_journalier,
-                }),
-            ]
-        }
-        
-        # Ajout des frais supplémentaires si présents
+        lignes = [
+            (0, 0, {
+                'name': f'{self.name} - Location {self.vehicule_id.name} du {self.date_debut} au {self.date_fin} '
+                        f'({self.detail_tarif})',
+                'quantity': 1,
+                'price_unit': self.montant_location,
+                'discount': self.reduction,
+            }),
+        ]
+        # Ajout des frais supplémentaires si présents (hors réduction)
         if self.frais_supplementaires > 0:
-            invoice_vals['invoice_line_ids'].append(
+            lignes.append(
                 (0, 0, {
-                    'name': 'Frais supplémentaires',
+                    'name': f'{self.name} - Frais supplémentaires',
                     'quantity': 1,
                     'price_unit': self.frais_supplementaires,
                 })
             )
-        
-        invoice = self.env['account.move'].create(invoice_vals)
-        self.invoice_id = invoice.id
+        return lignes
+
+    def _create_invoices(self, invoice_date=None):
+        """Crée les factures des contrats, une par client (un seul create)
+
+        :return: factures créées (brouillon)
+        """
+        if self.filtered('invoice_id'):
+            raise ValidationError(
+                "Une facture existe déjà pour : "
+                + ", ".join(self.filtered('invoice_id').mapped('name'))
+            )
+        par_client = {}
+        for record in self.sorted(lambda l: (l.client_id.id, l.date_debut, l.id)):
+            par_client.setdefault(record.client_id, self.browse())
+            par_client[record.client_id] |= record
+
+        vals_list = [{
+            'move_type': 'out_invoice',
+            'partner_id': client.id,
+            'invoice_date': invoice_date or fields.Date.today(),
+            'invoice_line_ids': [ligne for record in contrats for ligne in record._prepare_invoice_lines()],
+        } for client, contrats in par_client.items()]
+
+        invoices = self.env['account.move'].create(vals_list)
+        for contrats, invoice in zip(par_client.values(), invoices):
+            contrats.invoice_id = invoice
+        return invoices
+
+    def action_create_invoice(self):
+        """Crée une facture pour la location"""
+        self.ensure_one()
+        invoice = self._create_invoices()
         
         return {
             'type': 'ir.actions.act_window',
@@ -372,4 +806,103 @@ class Location(models.Model):
     def action_print_contract(self):
         """Imprime le contrat de location"""
         self.ensure_one()
-        return self.env.ref('location.report_location_contract').report_action(self)
\ No newline at end of file
+        return self.env.ref('location.report_location_contract').report_action(self)
+
+    def _nom_pdf_contrat(self):
+        """Nom de la pièce jointe du contrat, propre à sa dernière modification"""
+        self.ensure_one()
+        return 'Contrat_%s_%s.pdf' % (self.name.replace('/', '_'), self.write_date.strftime('%Y%m%d%H%M%S'))
+
+
+class StatistiqueMensuelle(models.Model):
+    _name = 'location.statistique.mensuelle'
+    _description = 'Statistiques mensuelles par véhicule'
+    _order = 'mois desc, vehicule_id'
+
+    vehicule_id = fields.Many2one('location.vehicule', string='Véhicule',
+                                  required=True, readonly=True, ondelete='cascade', index=True)
+    marque_id = fields.Many2one(related='vehicule_id.marque_id', string='Marque', store=True)
+    mois = fields.Date('Mois', required=True, readonly=True)
+    nombre_locations = fields.Integer('Locations démarrées', readonly=True)
+    jours_loues = fields.Integer('Jours loués', readonly=True)
+    taux_utilisation = fields.Float('Taux d\'utilisation (%)', readonly=True, aggregator='avg')
+    revenu = fields.Float('Revenu', readonly=True,
+                          help="Montant des contrats terminés, réparti au prorata des jours du mois")
+
+    _sql_constraints = [
+        ('vehicule_mois_unique', 'UNIQUE(vehicule_id, mois)',
+         'Une seule ligne par véhicule et par mois !'),
+    ]
+
+    @api.model
+    def _appliquer_deltas(self, deltas):
+        """Ajoute les variations {(vehicule_id, mois): [nombre, jours, revenu]}
+
+        Les lignes dont il ne reste ni location ni jour loué sont supprimées.
+        """
+        deltas = {cle: d for cle, d in deltas.items() if any(d)}
+        if not deltas:
+            return
+        self.flush_model()
+        vehicule_ids, mois = zip(*deltas)
+        nombres, jours, revenus = zip(*deltas.values())
+        self.env.cr.execute("""
+            INSERT INTO location_statistique_mensuelle AS s
+                   (vehicule_id, marque_id, mois, nombre_locations, jours_loues, taux_utilisation,
+                    revenu, create_uid, write_uid, create_date, write_date)
+            SELECT d.vehicule_id, v.marque_id, d.mois, d.nombre, d.jours,
+                   ROUND(d.jours * 100.0 / EXTRACT(DAY FROM d.mois + interval '1 month - 1 day')::numeric, 2),
+                   d.revenu, %(uid)s, %(uid)s, NOW() AT TIME ZONE 'UTC', NOW() AT TIME ZONE 'UTC'
+              FROM UNNEST(%(vehicule_ids)s::int[], %(mois)s::date[], %(nombres)s::int[],
+                          %(jours)s::int[], %(revenus)s::float8[]) AS d(vehicule_id, mois, nombre, jours, revenu)
+              JOIN location_vehicule v ON v.id = d.vehicule_id
+            ON CONFLICT (vehicule_id, mois) DO UPDATE
+               SET nombre_locations = s.nombre_locations + EXCLUDED.nombre_locations,
+                   jours_loues = s.jours_loues + EXCLUDED.jours_loues,
+                   taux_utilisation = ROUND((s.jours_loues + EXCLUDED.jours_loues) * 100.0
+                                            / EXTRACT(DAY FROM s.mois + interval '1 month - 1 day')::numeric, 2),
+                   revenu = s.revenu + EXCLUDED.revenu,
+                   write_uid = EXCLUDED.write_uid,
+                   write_date = EXCLUDED.write_date
+        """, {
+            'vehicule_ids': list(vehicule_ids), 'mois': list(mois), 'nombres': list(nombres),
+            'jours': list(jours), 'revenus': list(revenus), 'uid': self.env.uid,
+        })
+        self.env.cr.execute("""
+            DELETE FROM location_statistique_mensuelle s
+             USING UNNEST(%s::int[], %s::date[]) AS d(vehicule_id, mois)
+             WHERE s.vehicule_id = d.vehicule_id
+               AND s.mois = d.mois
+               AND s.nombre_locations <= 0
+               AND s.jours_loues <= 0
+        """, [list(vehicule_ids), list(mois)])
+        self.invalidate_model()
+
+    @api.model
+    def _refresh(self, vehicules):
+        """Reconstruit entièrement les lignes mensuelles des véhicules donnés (2 requêtes)"""
+        self.env.cr.execute(
+            "DELETE FROM location_statistique_mensuelle WHERE vehicule_id = ANY(%s)", [vehicules.ids]
+        )
+        self.env.cr.execute("""
+            INSERT INTO location_statistique_mensuelle
+                   (vehicule_id, marque_id, mois, nombre_locations, jours_loues, taux_utilisation,
+                    revenu, create_uid, write_uid, create_date, write_date)
+            SELECT l.vehicule_id,
+                   v.marque_id,
+                   date_trunc('month', jour)::date AS mois,
+                   COUNT(*) FILTER (WHERE jour::date = l.date_debut),
+                   COUNT(*),
+                   ROUND(COUNT(*) * 100.0 / EXTRACT(DAY FROM date_trunc('month', jour)
+                                                    + interval '1 month - 1 day')::numeric, 2),
+                   COALESCE(SUM(l.montant_total / (l.date_fin - l.date_debut + 1))
+                            FILTER (WHERE l.statut = 'terminee'), 0),
+                   %(uid)s, %(uid)s, NOW() AT TIME ZONE 'UTC', NOW() AT TIME ZONE 'UTC'
+              FROM location_location l
+              JOIN location_vehicule v ON v.id = l.vehicule_id
+        CROSS JOIN LATERAL generate_series(l.date_debut, l.date_fin, interval '1 day') AS jour
+             WHERE l.vehicule_id = ANY(%(ids)s)
+               AND l.statut IN ('en_cours', 'terminee')
+          GROUP BY l.vehicule_id, v.marque_id, date_trunc('month', jour)
+        """, {'ids': vehicules.ids, 'uid': self.env.uid})
+        self.invalidate_model()
\ No newline at end of file
@@ -0,0 +1,72 @@
+from odoo import models, fields, api
+from odoo.exceptions import ValidationError
+
+
+class ReservationVehicule(models.TransientModel):
+    _name = 'location.reservation'
+    _description = 'Recherche de véhicules disponibles'
+
+    client_id = fields.Many2one('res.partner', string='Client')
+    date_debut = fields.Date('Date de début', required=True, default=fields.Date.today)
+    date_fin = fields.Date('Date de fin', required=True, default=fields.Date.today)
+    nombre_places_min = fields.Integer('Places minimum')
+    type_carburant = fields.Selection([
+        ('essence', 'Essence'),
+        ('diesel', 'Diesel'),
+        ('electrique', 'Électrique'),
+        ('hybride', 'Hybride'),
+    ], string='Type de carburant')
+    marque_id = fields.Many2one('location.marque', string='Marque')
+    prix_journalier_max = fields.Float('Prix par jour maximum')
+
+    vehicule_disponible_ids = fields.Many2many(
+        'location.vehicule',
+        string='Véhicules disponibles',
+        compute='_compute_vehicule_disponible_ids'
+    )
+    vehicule_id = fields.Many2one(
+        'location.vehicule',
+        string='Véhicule choisi',
+        domain="[('id', 'in', vehicule_disponible_ids)]"
+    )
+
+    @api.depends('date_debut', 'date_fin', 'nombre_places_min', 'type_carburant',
+                 'marque_id', 'prix_journalier_max')
+    def _compute_vehicule_disponible_ids(self):
+        for record in self:
+            if not record.date_debut or not record.date_fin or record.date_fin < record.date_debut:
+                record.vehicule_disponible_ids = False
+                continue
+            record.vehicule_disponible_ids = self.env['location.vehicule'].search_available(
+                record.date_debut,
+                record.date_fin,
+                nombre_places_min=record.nombre_places_min,
+                type_carburant=record.type_carburant,
+                marque_id=record.marque_id.id,
+                prix_journalier_max=record.prix_journalier_max,
+            )
+
+    def action_reserver(self):
+        """Crée le contrat en brouillon pour le véhicule choisi"""
+        self.ensure_one()
+        if not self.client_id or not self.vehicule_id:
+            raise ValidationError("Choisissez un client et un véhicule disponible.")
+        if self.vehicule_id not in self.vehicule_disponible_ids:
+            raise ValidationError(
+                f"Le véhicule {self.vehicule_id.name} n'est plus disponible sur cette période."
+            )
+        location = self.env['location.location'].create({
+            'client_id': self.client_id.id,
+            'vehicule_id': self.vehicule_id.id,
+            'date_debut': self.date_debut,
+            'date_fin': self.date_fin,
+            'kilometrage_depart': self.vehicule_id.kilometrage,
+        })
+        return {
+            'type': 'ir.actions.act_window',
+            'name': 'Location',
+            'res_model': 'location.location',
+            'res_id': location.id,
+            'view_mode': 'form',
+            'target': 'current',
+        }
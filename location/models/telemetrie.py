@@ -0,0 +1,181 @@
+from datetime import datetime, timezone
+
+from odoo import models, fields, api
+from odoo.exceptions import UserError, ValidationError
+from odoo.tools.sql import create_index
+
+
+class ReleveTelemetrie(models.Model):
+    """Relevés kilométrage / carburant transmis par la passerelle télématique
+
+    Table en ajout seul et compacte (sans colonnes de traçabilité) : l'index
+    BRIN sur l'horodatage reste minuscule car les relevés arrivent dans
+    l'ordre chronologique.
+    """
+    _name = 'location.telemetrie'
+    _description = 'Relevé télématique de véhicule'
+    _order = 'horodatage desc, id desc'
+    _log_access = False
+
+    vehicule_id = fields.Many2one('location.vehicule', string='Véhicule',
+                                  required=True, readonly=True, ondelete='cascade')
+    horodatage = fields.Datetime('Horodatage', required=True, readonly=True)
+    kilometrage = fields.Integer('Kilométrage (km)', readonly=True, aggregator='max')
+    niveau_carburant = fields.Integer('Carburant (%)', readonly=True, aggregator='avg')
+
+    _sql_constraints = [
+        # Un relevé renvoyé par la passerelle n'est enregistré qu'une fois
+        ('vehicule_horodatage_unique', 'UNIQUE(vehicule_id, horodatage)',
+         'Ce relevé a déjà été enregistré !'),
+        ('check_carburant', 'CHECK(niveau_carburant BETWEEN 0 AND 100)',
+         'Le niveau de carburant doit être entre 0 et 100 %'),
+    ]
+
+    # Relevés acceptés par appel de la passerelle
+    BATCH_MAX = 5000
+    # Borne de la colonne integer PostgreSQL
+    KILOMETRAGE_MAX = 2**31 - 1
+
+    def init(self):
+        create_index(self.env.cr, 'location_telemetrie_horodatage_brin',
+                     self._table, ['horodatage'], method='brin')
+
+    def write(self, vals):
+        raise UserError("Les relevés télématiques ne peuvent pas être modifiés.")
+
+    @api.model
+    def _ingest(self, releves):
+        """Enregistre un lot de relevés et met à jour véhicules et contrats
+
+        Quatre requêtes quelle que soit la taille du lot : résolution des
+        immatriculations, insertion (UNNEST), kilométrage des véhicules,
+        relevés de retour des contrats en cours.
+
+        Les relevés invalides sont écartés un par un, sans rejeter le lot.
+
+        :param releves: liste de dicts {immatriculation, horodatage (ISO 8601,
+                        UTC si sans fuseau), kilometrage, carburant (%, optionnel)}
+        :return: dict {recus, enregistres, inconnus, rejets: [{index, motif}]}
+        """
+        if not isinstance(releves, list):
+            raise ValidationError("Les relevés doivent être transmis sous forme de liste.")
+        if len(releves) > self.BATCH_MAX:
+            raise ValidationError(f"Lot trop volumineux : {self.BATCH_MAX} relevés maximum.")
+
+        lignes, rejets = [], []
+        for index, releve in enumerate(releves):
+            try:
+                lignes.append(self._parse_releve(releve))
+            except (AttributeError, KeyError, TypeError, ValueError) as e:
+                motif = f"champ manquant : {e}" if isinstance(e, KeyError) else str(e)
+                rejets.append({'index': index, 'motif': motif})
+
+        self.env['location.vehicule'].flush_model(['immatriculation'])
+        self.env.cr.execute("""
+            SELECT UPPER(immatriculation), id
+              FROM location_vehicule
+             WHERE UPPER(immatriculation) = ANY(%s)
+        """, [list({ligne[0] for ligne in lignes})])
+        vehicules = dict(self.env.cr.fetchall())
+        connus = [ligne for ligne in lignes if ligne[0] in vehicules]
+
+        self.env.cr.execute("""
+            INSERT INTO location_telemetrie (vehicule_id, horodatage, kilometrage, niveau_carburant)
+            SELECT * FROM UNNEST(%s::int[], %s::timestamp[], %s::int[], %s::int[])
+            ON CONFLICT (vehicule_id, horodatage) DO NOTHING
+            RETURNING vehicule_id
+        """, [
+            [vehicules[ligne[0]] for ligne in connus],
+            [ligne[1] for ligne in connus],
+            [ligne[2] for ligne in connus],
+            [ligne[3] for ligne in connus],
+        ])
+        inseres = [row[0] for row in self.env.cr.fetchall()]
+        vehicule_ids = list(set(inseres))
+        if vehicule_ids:
+            self._apply_releves(vehicule_ids)
+
+        return {
+            'recus': len(releves),
+            'enregistres': len(inseres),
+            'inconnus': sorted({ligne[0] for ligne in lignes} - vehicules.keys()),
+            'rejets': rejets,
+        }
+
+    @api.model
+    def _parse_releve(self, releve):
+        """Valide un relevé de la passerelle
+
+        :return: tuple (immatriculation, horodatage UTC naïf, kilometrage, carburant)
+        :raise ValueError: relevé hors bornes ou mal formé (motif en message)
+        """
+        immatriculation = str(releve['immatriculation']).strip().upper()
+        if not immatriculation:
+            raise ValueError("immatriculation vide")
+
+        horodatage = datetime.fromisoformat(str(releve['horodatage']).strip().replace('Z', '+00:00'))
+        if horodatage.tzinfo:
+            horodatage = horodatage.astimezone(timezone.utc).replace(tzinfo=None)
+        # Précision de fields.Datetime : un relevé renvoyé reste un doublon
+        horodatage = horodatage.replace(microsecond=0)
+
+        kilometrage = int(releve['kilometrage'])
+        if not 0 <= kilometrage <= self.KILOMETRAGE_MAX:
+            raise ValueError(f"kilométrage hors bornes : {kilometrage}")
+
+        carburant = releve.get('carburant')
+        if carburant is not None:
+            carburant = int(carburant)
+            if not 0 <= carburant <= 100:
+                raise ValueError(f"niveau de carburant hors bornes : {carburant}")
+
+        return immatriculation, horodatage, kilometrage, carburant
+
+    @api.model
+    def _apply_releves(self, vehicule_ids):
+        """Reporte le dernier relevé sur les véhicules et leurs contrats en cours"""
+        Location = self.env['location.location']
+        Location.flush_model(['vehicule_id', 'statut', 'date_debut', 'kilometrage_retour',
+                              'niveau_carburant_retour'])
+        self.env['location.vehicule'].flush_model(['kilometrage'])
+
+        # Le compteur ne recule jamais (relevé en retard ou erroné)
+        self.env.cr.execute("""
+            UPDATE location_vehicule v
+               SET kilometrage = r.kilometrage
+              FROM (SELECT vehicule_id, MAX(kilometrage) AS kilometrage
+                      FROM location_telemetrie
+                     WHERE vehicule_id = ANY(%s)
+                  GROUP BY vehicule_id) r
+             WHERE r.vehicule_id = v.id
+               AND r.kilometrage > COALESCE(v.kilometrage, 0)
+        """, [vehicule_ids])
+
+        # Dernier relevé depuis le début du contrat = relevé de retour provisoire
+        self.env.cr.execute("""
+            UPDATE location_location l
+               SET kilometrage_retour = r.kilometrage,
+                   niveau_carburant_retour = CASE
+                       WHEN r.niveau_carburant IS NULL THEN l.niveau_carburant_retour
+                       WHEN r.niveau_carburant < 13 THEN 'vide'
+                       WHEN r.niveau_carburant < 38 THEN '1/4'
+                       WHEN r.niveau_carburant < 63 THEN '1/2'
+                       WHEN r.niveau_carburant < 88 THEN '3/4'
+                       ELSE 'plein'
+                   END
+              FROM location_location c
+        CROSS JOIN LATERAL (
+                       SELECT t.kilometrage, t.niveau_carburant
+                         FROM location_telemetrie t
+                        WHERE t.vehicule_id = c.vehicule_id
+                          AND t.horodatage >= c.date_debut
+                     ORDER BY t.horodatage DESC
+                        LIMIT 1
+                   ) r
+             WHERE l.id = c.id
+               AND c.vehicule_id = ANY(%s)
+               AND c.statut = 'en_cours'
+        """, [vehicule_ids])
+
+        self.env['location.vehicule'].invalidate_model(['kilometrage'])
+        Location.invalidate_model(['kilometrage_retour', 'niveau_carburant_retour'])
@@ -0,0 +1,4 @@
+from . import test_location
+from . import test_impression
+from . import test_telemetrie
+from . import test_statistiques
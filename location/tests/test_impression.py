@@ -0,0 +1,57 @@
+import io
+from datetime import date
+from unittest.mock import patch
+
+from odoo.tests import TransactionCase, tagged
+from odoo.tools.pdf import PdfFileWriter
+
+
+def _pdf_vide():
+    writer = PdfFileWriter()
+    writer.addBlankPage(100, 100)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+@tagged('post_install', '-at_install')
+class TestImpression(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        marque = cls.env['location.marque'].create({'name': 'Test', 'code': 'TST'})
+        vehicule = cls.env['location.vehicule'].create({
+            'name': 'Véhicule test',
+            'marque_id': marque.id,
+            'immatriculation': 'TEST-001',
+            'prix_journalier': 20000.0,
+        })
+        cls.location = cls.env['location.location'].create({
+            'client_id': cls.env['res.partner'].create({'name': 'Client test'}).id,
+            'vehicule_id': vehicule.id,
+            'date_debut': date(2026, 3, 1),
+            'date_fin': date(2026, 3, 5),
+        })
+
+    def _imprimer(self, mode='fusion'):
+        impression = self.env['location.impression'].create({
+            'location_ids': [(6, 0, self.location.ids)],
+            'mode': mode,
+        })
+        impression.with_context(force_report_rendering=True)._traiter()
+        self.assertEqual(impression.state, 'termine')
+        self.assertTrue(impression.fichier)
+        return impression
+
+    def test_contrat_inchange_non_rendu_deux_fois(self):
+        Report = self.registry['ir.actions.report']
+        with patch.object(Report, '_run_wkhtmltopdf', return_value=_pdf_vide()) as wkhtmltopdf:
+            premiere = self._imprimer()
+            seconde = self._imprimer(mode='zip')
+
+        self.assertEqual(premiere.nombre_rendus, 1)
+        self.assertEqual(seconde.nombre_rendus, 0)
+        self.assertEqual(wkhtmltopdf.call_count, 1)
+        pieces = self.env['location.impression']._get_pieces_jointes(self.location)
+        self.assertEqual(pieces.mapped('name'), [self.location._nom_pdf_contrat()])
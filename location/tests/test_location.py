@@ -0,0 +1,64 @@
+from datetime import date
+
+from psycopg2 import IntegrityError
+
+from odoo.tests import TransactionCase, tagged
+from odoo.tools import mute_logger
+
+
+@tagged('post_install', '-at_install')
+class TestLocation(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.marque = cls.env['location.marque'].create({'name': 'Test', 'code': 'TST'})
+        cls.vehicule = cls.env['location.vehicule'].create({
+            'name': 'Véhicule test',
+            'marque_id': cls.marque.id,
+            'immatriculation': 'TEST-001',
+            'prix_journalier': 20000.0,
+        })
+        cls.client = cls.env['res.partner'].create({'name': 'Client test'})
+
+    def _create_location(self, date_debut, date_fin, **vals):
+        return self.env['location.location'].create({
+            'client_id': self.client.id,
+            'vehicule_id': self.vehicule.id,
+            'date_debut': date_debut,
+            'date_fin': date_fin,
+            **vals,
+        })
+
+    def test_periode_englobante_refusee(self):
+        """Un contrat englobant un contrat confirmé est refusé
+
+        Cas que l'ancienne vérification Python (domaine en OU sur les
+        bornes) laissait passer.
+        """
+        self._create_location(date(2026, 3, 10), date(2026, 3, 12)).action_confirmer()
+        englobant = self._create_location(date(2026, 3, 1), date(2026, 3, 31))
+        with mute_logger('odoo.sql_db'), self.assertRaises(IntegrityError):
+            englobant.action_confirmer()
+            englobant.flush_recordset()
+
+    def test_periode_incluse_refusee(self):
+        self._create_location(date(2026, 3, 1), date(2026, 3, 31)).action_confirmer()
+        inclus = self._create_location(date(2026, 3, 10), date(2026, 3, 12))
+        with mute_logger('odoo.sql_db'), self.assertRaises(IntegrityError):
+            inclus.action_confirmer()
+            inclus.flush_recordset()
+
+    def test_periodes_adjacentes_et_brouillons(self):
+        """Bornes incluses : le lendemain est libre ; les brouillons ne bloquent pas"""
+        self._create_location(date(2026, 3, 1), date(2026, 3, 10)).action_confirmer()
+        self._create_location(date(2026, 3, 11), date(2026, 3, 20)).action_confirmer()
+        brouillon = self._create_location(date(2026, 3, 5), date(2026, 3, 15))
+        brouillon.flush_recordset()
+        self.assertEqual(brouillon.statut, 'brouillon')
+
+    def test_search_available_exclut_periode_englobante(self):
+        self._create_location(date(2026, 3, 10), date(2026, 3, 12)).action_confirmer()
+        Vehicule = self.env['location.vehicule']
+        self.assertNotIn(self.vehicule, Vehicule.search_available(date(2026, 3, 1), date(2026, 3, 31)))
+        self.assertIn(self.vehicule, Vehicule.search_available(date(2026, 3, 13), date(2026, 3, 31)))
@@ -0,0 +1,81 @@
+from datetime import date
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestStatistiques(TransactionCase):
+    """Les variations appliquées par les contrats égalent une reconstruction complète"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        marque = cls.env['location.marque'].create({'name': 'Test', 'code': 'TST'})
+        cls.vehicule = cls.env['location.vehicule'].create({
+            'name': 'Véhicule test',
+            'marque_id': marque.id,
+            'immatriculation': 'TEST-001',
+            'prix_journalier': 20000.0,
+        })
+        cls.client = cls.env['res.partner'].create({'name': 'Client test'})
+
+    def _create_location(self, date_debut, date_fin, **vals):
+        return self.env['location.location'].create({
+            'client_id': self.client.id,
+            'vehicule_id': self.vehicule.id,
+            'date_debut': date_debut,
+            'date_fin': date_fin,
+            **vals,
+        })
+
+    def _statistiques(self):
+        self.env.flush_all()
+        self.env.cr.execute("""
+            SELECT total_locations, ROUND(revenu_total::numeric, 2), jours_loues, taux_utilisation
+              FROM location_vehicule
+             WHERE id = %s
+        """, [self.vehicule.id])
+        *vehicule, taux = self.env.cr.fetchone()
+        self.env.cr.execute("""
+            SELECT mois, nombre_locations, jours_loues, taux_utilisation, ROUND(revenu::numeric, 2)
+              FROM location_statistique_mensuelle
+             WHERE vehicule_id = %s
+          ORDER BY mois
+        """, [self.vehicule.id])
+        return vehicule, taux, self.env.cr.fetchall()
+
+    def assertStatistiquesCompletes(self):
+        vehicule, taux, mois = self._statistiques()
+        self.vehicule._refresh_statistiques()
+        attendu_vehicule, attendu_taux, attendu_mois = self._statistiques()
+        self.assertEqual(vehicule, attendu_vehicule)
+        self.assertEqual(mois, attendu_mois)
+        # Taux arrondi à chaque variation : écart d'arrondi corrigé chaque nuit
+        self.assertAlmostEqual(taux, attendu_taux, delta=0.05)
+
+    def test_cycle_de_vie_des_contrats(self):
+        # À cheval sur deux mois
+        location = self._create_location(date(2026, 1, 25), date(2026, 2, 5))
+        location.action_confirmer()
+        self.assertEqual(self.vehicule.total_locations, 1)
+        location.action_demarrer()
+        location.action_terminer()
+        self.assertStatistiquesCompletes()
+        self.assertEqual(self.vehicule.jours_loues, 12)
+
+        location.write({'frais_supplementaires': 15000.0, 'date_fin': date(2026, 2, 10)})
+        self.assertStatistiquesCompletes()
+
+        autre = self._create_location(date(2026, 3, 1), date(2026, 3, 3), statut='en_cours')
+        self.assertStatistiquesCompletes()
+        autre.action_annuler()
+        self.assertStatistiquesCompletes()
+        autre.unlink()
+        location.unlink()
+        self.assertStatistiquesCompletes()
+        self.assertEqual(self._statistiques(), ([0, 0, 0], 0.0, []))
+
+    def test_brouillon_sans_effet(self):
+        self._create_location(date(2026, 4, 1), date(2026, 4, 3))
+        self.assertEqual(self.vehicule.total_locations, 0)
+        self.assertStatistiquesCompletes()
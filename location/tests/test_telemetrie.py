@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestTelemetrie(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        marque = cls.env['location.marque'].create({'name': 'Test', 'code': 'TST'})
+        cls.vehicule = cls.env['location.vehicule'].create({
+            'name': 'Véhicule test',
+            'marque_id': marque.id,
+            'immatriculation': 'TEST-001',
+            'prix_journalier': 20000.0,
+        })
+
+    def test_releves_invalides_rejetes_un_par_un(self):
+        result = self.env['location.telemetrie']._ingest([
+            {'immatriculation': 'test-001', 'horodatage': '2026-03-01T10:00:00Z', 'kilometrage': 1200, 'carburant': 80},
+            {'immatriculation': 'TEST-001', 'horodatage': '2026-03-01T11:00:00', 'kilometrage': 1250, 'carburant': 140},
+            {'immatriculation': 'TEST-001', 'horodatage': '2026-03-01T12:00:00', 'kilometrage': -5},
+            {'immatriculation': 'TEST-001', 'horodatage': 'hier', 'kilometrage': 1300},
+            {'immatriculation': 'TEST-001', 'kilometrage': 1300},
+        ])
+        self.assertEqual(result['recus'], 5)
+        self.assertEqual(result['enregistres'], 1)
+        self.assertEqual([rejet['index'] for rejet in result['rejets']], [1, 2, 3, 4])
+        self.assertEqual(self.vehicule.kilometrage, 1200)
+
+    def test_horodatage_converti_en_utc(self):
+        self.env['location.telemetrie']._ingest([
+            {'immatriculation': 'TEST-001', 'horodatage': '2026-03-01T12:30:00+02:00', 'kilometrage': 1000},
+        ])
+        releve = self.env['location.telemetrie'].search([('vehicule_id', '=', self.vehicule.id)])
+        self.assertEqual(releve.horodatage, datetime(2026, 3, 1, 10, 30))
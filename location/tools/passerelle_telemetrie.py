@@ -0,0 +1,81 @@
+"""
+Passerelle télématique simulée
+
+Envoie par lots des relevés kilométrage / carburant à /location/telemetrie,
+comme le ferait la passerelle installée sur le parking. Chaque véhicule
+roule un nombre aléatoire de kilomètres et consomme du carburant entre
+deux relevés.
+
+Exemple :
+    python3 passerelle_telemetrie.py --url http://localhost:8069 \\
+        --token SECRET --immatriculation AB-123-CD --immatriculation EF-456-GH \\
+        --releves 96 --intervalle 15 --lot 500
+"""
+
+import argparse
+import json
+import random
+import sys
+import urllib.error
+import urllib.request
+from datetime import datetime, timedelta, timezone
+
+
+def simuler(immatriculations, nombre, intervalle):
+    """Relevés chronologiques pour chaque véhicule, du plus ancien au plus récent"""
+    debut = datetime.now(timezone.utc).replace(microsecond=0) - timedelta(minutes=nombre * intervalle)
+    etats = {immat: [random.randint(5000, 80000), random.randint(40, 100)] for immat in immatriculations}
+    for index in range(nombre):
+        horodatage = debut + timedelta(minutes=index * intervalle)
+        for immat, etat in etats.items():
+            etat[0] += random.randint(0, intervalle)
+            etat[1] = etat[1] - random.randint(0, 2) if etat[1] > 10 else 100
+            yield {
+                'immatriculation': immat,
+                'horodatage': horodatage.strftime('%Y-%m-%dT%H:%M:%S'),
+                'kilometrage': etat[0],
+                'carburant': etat[1],
+            }
+
+
+def envoyer(url, token, releves):
+    request = urllib.request.Request(
+        url.rstrip('/') + '/location/telemetrie',
+        data=json.dumps({'releves': releves}).encode(),
+        headers={'Content-Type': 'application/json', 'X-Telemetrie-Token': token},
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return json.loads(e.read() or b'{}') or {'error': str(e)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--url', default='http://localhost:8069', help='URL du serveur Odoo')
+    parser.add_argument('--token', required=True, help='Valeur de location.telemetrie_token')
+    parser.add_argument('--immatriculation', action='append', required=True,
+                        help='Immatriculation d\'un véhicule (répéter pour plusieurs)')
+    parser.add_argument('--releves', type=int, default=24, help='Relevés par véhicule')
+    parser.add_argument('--intervalle', type=int, default=15, help='Minutes entre deux relevés')
+    parser.add_argument('--lot', type=int, default=500, help='Relevés par envoi')
+    args = parser.parse_args()
+
+    releves = list(simuler(args.immatriculation, args.releves, args.intervalle))
+    erreurs = 0
+    for debut in range(0, len(releves), args.lot):
+        result = envoyer(args.url, args.token, releves[debut:debut + args.lot])
+        if 'error' in result:
+            erreurs += 1
+            print(f"  ! {result['error']}")
+        else:
+            print(f"{result['recus']} reçus, {result['enregistres']} enregistrés"
+                  + (f", inconnus : {', '.join(result['inconnus'])}" if result['inconnus'] else ''))
+            for rejet in result.get('rejets', []):
+                print(f"  ! relevé {debut + rejet['index']} rejeté : {rejet['motif']}")
+    return 1 if erreurs else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
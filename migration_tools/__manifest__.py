@@ -0,0 +1,21 @@
+{
+    'name': 'Outils de migration',
+    'version': '18.0.1.0.0',
+    'category': 'Hidden/Tools',
+    'summary': 'Migrations SQL par lots, reprenables, pour les modules maison',
+    'description': """
+        Outils partagés par les scripts de migration des modules
+        =========================================================
+
+        * UPDATE ensemblistes découpés en lots d'ids, validés un par un
+        * Reprise au dernier lot validé après une interruption
+        * Génération de codes uniques sans collision
+    """,
+    'author': 'Beda',
+    'license': 'LGPL-3',
+    'depends': ['base'],
+    'data': [],
+    'installable': True,
+    'application': False,
+    'auto_install': False,
+}
@@ -0,0 +1,80 @@
+from unittest.mock import patch
+
+from psycopg2 import DataError
+
+from odoo.tests import TransactionCase, tagged
+from odoo.tools import mute_logger
+
+from odoo.addons.migration_tools.tools.migration import code_base, run_batches, unique_codes
+
+
+@tagged('post_install', '-at_install')
+class TestUniqueCodes(TransactionCase):
+
+    def test_code_base(self):
+        self.assertEqual(code_base('Citroën'), 'CIT')
+        self.assertEqual(code_base('É-Tech', length=4), 'ETEC')
+        self.assertEqual(code_base('  '), 'X')
+        self.assertEqual(code_base(False), 'X')
+
+    def test_collisions_entre_noms_et_existants(self):
+        codes = unique_codes(['Toyota', 'Tôyota Motor', 'Renault', 'Peugeot'], existing_codes={'REN'})
+        self.assertEqual(codes, {
+            'Toyota': 'TOY',
+            'Tôyota Motor': 'TOY2',
+            'Renault': 'REN2',
+            'Peugeot': 'PEU',
+        })
+
+    def test_suffixes_deja_pris(self):
+        codes = unique_codes(['Mazda', 'Mazeratti'], existing_codes={'MAZ', 'MAZ2'})
+        self.assertEqual(codes, {'Mazda': 'MAZ3', 'Mazeratti': 'MAZ4'})
+
+
+@tagged('post_install', '-at_install')
+class TestRunBatches(TransactionCase):
+    """Reprise de run_batches après une interruption
+
+    Chaque COMMIT de lot est simulé par un SAVEPOINT : une erreur ramène la
+    transaction au dernier lot « validé », comme un redémarrage de la mise
+    à jour après un COMMIT réel.
+    """
+
+    QUERY = """
+        UPDATE test_migration_batches
+           SET passages = passages + 1 / (CASE WHEN id = %(echec_id)s THEN 0 ELSE 1 END)
+         WHERE id >= %(min_id)s
+           AND id < %(max_id)s
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.cr.execute("""
+            CREATE TEMPORARY TABLE test_migration_batches (
+                id SERIAL PRIMARY KEY,
+                passages INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self.cr.execute("INSERT INTO test_migration_batches (passages) SELECT 0 FROM generate_series(1, 10)")
+        self.cr.execute("SAVEPOINT lot_valide")
+        commit = patch.object(self.cr, 'commit', side_effect=lambda: self.cr.execute("SAVEPOINT lot_valide"))
+        commit.start()
+        self.addCleanup(commit.stop)
+
+    def _run(self, echec_id=0):
+        return run_batches(self.cr, 'test_migration_batches', self.QUERY, 'test_migration_batches',
+                           params={'echec_id': echec_id}, batch_size=3)
+
+    def test_reprise_apres_interruption(self):
+        # Le troisième lot (ids 7 à 9) échoue : les deux premiers sont validés
+        with mute_logger('odoo.sql_db'), self.assertRaises(DataError):
+            self._run(echec_id=8)
+        self.cr.execute("ROLLBACK TO SAVEPOINT lot_valide")
+
+        self.assertEqual(self._run(), 4)
+        self.cr.execute("SELECT passages, COUNT(*) FROM test_migration_batches GROUP BY passages")
+        # Chaque ligne traitée une seule fois : aucun lot validé n'est rejoué
+        self.assertEqual(dict(self.cr.fetchall()), {1: 10})
+
+        # Opération terminée : un nouvel appel ne fait rien
+        self.assertEqual(self._run(), 0)
@@ -0,0 +1,157 @@
+"""
+Outils de migration ensemblistes, découpés en lots et reprenables
+
+Destinés aux scripts migrations/<version>/*-migration.py des modules qui
+dépendent de migration_tools :
+
+    from odoo.addons.migration_tools.tools.migration import batched_update
+
+    def migrate(cr, version):
+        batched_update(cr, 'location_location', "montant_total = 0",
+                       where="montant_total IS NULL", name='location_montant_total')
+
+Chaque lot est validé (COMMIT) séparément : les verrous ne sont tenus que
+le temps d'un lot, et une mise à jour interrompue reprend au dernier lot
+validé (progression enregistrée dans la table migration_batch_progress).
+Les requêtes doivent donc être idempotentes : un lot rejoué ne doit rien
+changer (filtrer sur « colonne IS NULL » par exemple).
+"""
+
+import logging
+import re
+import time
+import unicodedata
+
+_logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 10000
+PROGRESS_TABLE = 'migration_batch_progress'
+
+
+def column_exists(cr, table, column):
+    cr.execute("""
+        SELECT 1
+          FROM information_schema.columns
+         WHERE table_name = %s
+           AND column_name = %s
+    """, [table, column])
+    return bool(cr.fetchone())
+
+
+def _ensure_progress_table(cr):
+    cr.execute(f"""
+        CREATE TABLE IF NOT EXISTS {PROGRESS_TABLE} (
+            name VARCHAR PRIMARY KEY,
+            last_id INTEGER NOT NULL,
+            done BOOLEAN NOT NULL DEFAULT FALSE,
+            write_date TIMESTAMP NOT NULL DEFAULT (NOW() AT TIME ZONE 'UTC')
+        )
+    """)
+
+
+def _get_progress(cr, name):
+    cr.execute(f"SELECT last_id, done FROM {PROGRESS_TABLE} WHERE name = %s", [name])
+    return cr.fetchone() or (0, False)
+
+
+def _set_progress(cr, name, last_id, done=False):
+    cr.execute(f"""
+        INSERT INTO {PROGRESS_TABLE} (name, last_id, done)
+        VALUES (%s, %s, %s)
+        ON CONFLICT (name) DO UPDATE
+           SET last_id = EXCLUDED.last_id,
+               done = EXCLUDED.done,
+               write_date = NOW() AT TIME ZONE 'UTC'
+    """, [name, last_id, done])
+
+
+def run_batches(cr, table, query, name, params=None, batch_size=BATCH_SIZE):
+    """
+    Exécuter une requête par tranches d'id de la table, avec reprise
+
+    La requête reçoit les bornes %(min_id)s (incluse) et %(max_id)s
+    (exclue) à appliquer sur la colonne id de la table, par exemple :
+    "UPDATE t SET x = 1 WHERE id >= %(min_id)s AND id < %(max_id)s".
+
+    :param name: identifiant unique de l'opération (clé de reprise)
+    :return: nombre total de lignes traitées lors de cet appel
+    """
+    _ensure_progress_table(cr)
+    last_id, done = _get_progress(cr, name)
+    if done:
+        _logger.info("%s : déjà effectuée, ignorée", name)
+        return 0
+
+    cr.execute(f"SELECT MAX(id) FROM {table}")
+    max_id = cr.fetchone()[0] or 0
+    if last_id:
+        _logger.info("%s : reprise après l'id %s", name, last_id)
+
+    total, start = 0, time.monotonic()
+    lower = last_id + 1
+    while lower <= max_id:
+        upper = lower + batch_size
+        cr.execute(query, {**(params or {}), 'min_id': lower, 'max_id': upper})
+        total += max(cr.rowcount, 0)
+        _set_progress(cr, name, upper - 1)
+        # Fin de lot : libère les verrous, rend la progression durable
+        cr.commit()
+        _logger.info(
+            "%s : %s/%s ids (%.0f %%), %s lignes, %.1f s",
+            name, min(upper - 1, max_id), max_id, min(upper - 1, max_id) * 100 / max_id,
+            total, time.monotonic() - start,
+        )
+        lower = upper
+
+    _set_progress(cr, name, max_id, done=True)
+    cr.commit()
+    _logger.info("%s : terminée, %s lignes en %.1f s", name, total, time.monotonic() - start)
+    return total
+
+
+def batched_update(cr, table, set_sql, name, where=None, from_sql=None, params=None,
+                   batch_size=BATCH_SIZE):
+    """
+    UPDATE ensembliste par lots : UPDATE table t SET ... [FROM ...] WHERE ...
+
+    Les colonnes de la table sont préfixées par l'alias « t ».
+
+    :param set_sql: clause SET, ex. "marque_id = m.id"
+    :param where: condition supplémentaire, ex. "t.marque_id IS NULL"
+    :param from_sql: clause FROM, ex. "location_marque m"
+    """
+    query = f"""
+        UPDATE {table} t
+           SET {set_sql}
+          {f'FROM {from_sql}' if from_sql else ''}
+         WHERE t.id >= %(min_id)s
+           AND t.id < %(max_id)s
+           {f'AND ({where})' if where else ''}
+    """
+    return run_batches(cr, table, query, name, params=params, batch_size=batch_size)
+
+
+def code_base(name, length=3):
+    """Préfixe de code : lettres et chiffres sans accents, en majuscules"""
+    ascii_name = unicodedata.normalize('NFKD', name or '').encode('ascii', 'ignore').decode()
+    return re.sub(r'[^A-Za-z0-9]', '', ascii_name).upper()[:length] or 'X'
+
+
+def unique_codes(names, existing_codes, length=3):
+    """
+    Codes uniques pour une liste de noms, sans collision entre eux ni avec
+    les codes existants : préfixe du nom, puis préfixe suffixé 2, 3, ...
+
+    :return: dict {nom: code}
+    """
+    used = set(existing_codes)
+    codes = {}
+    for name in names:
+        base = code_base(name, length)
+        code, counter = base, 1
+        while code in used:
+            counter += 1
+            code = f'{base}{counter}'
+        used.add(code)
+        codes[name] = code
+    return codes